@@ -1,15 +1,29 @@
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
+from fastapi import FastAPI, Request, Query
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
+from datetime import datetime, timezone
+import email.utils
 import functools
-from pathlib import Path
+import hashlib
 import json
+from pathlib import Path
+import sys
+import time
+import zipfile
+
+# Shared modules from src/ (kept free of LLM/model imports)
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+from usage import usage_ledger
+from storage import get_storage, REFERENCES_DIR
+from output_index import OutputIndex, Document
+from leaderboard import Leaderboard, METRICS
 
 # ─── Configuration ───────────────────────────────────────────
 
-OUTPUTS_DIR = Path(__file__).parent / "src" / "outputs"
-REFERENCES_DIR = Path(__file__).parent / "src" / "data" / "references"
+# Outputs and evaluations are read through the configured storage backend
+# (STORAGE_BACKEND=json|sqlite, see src/storage.py)
+store = get_storage()
 
 app = FastAPI(
     title="BA Creation of internet entries with MCP Server",
@@ -17,6 +31,9 @@ app = FastAPI(
     version="0.1.0",
 )
 
+output_index = OutputIndex(store, REFERENCES_DIR)
+leaderboard = Leaderboard(output_index)
+
 templates = Jinja2Templates(directory=Path(__file__).parent / "templates")
 app.mount("/static", StaticFiles(directory=Path(__file__).parent / "static"), name="static")
 
@@ -24,24 +41,53 @@ app.mount("/static", StaticFiles(directory=Path(__file__).parent / "static"), na
 # ─── Helper functions ────────────────────────────────────────
 
 def get_projects() -> list[str]:
-    if not OUTPUTS_DIR.exists():
-        return []
-    return sorted(
-        p.name for p in OUTPUTS_DIR.iterdir()
-        if p.is_dir() and (p / "output.json").exists()
-    )
+    return output_index.projects()
+
+
+def _cache_headers(etag: str, last_modified: float | None = None) -> dict:
+    # no-cache: browsers may store the response but must revalidate it (cheap 304s)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = email.utils.formatdate(last_modified, usegmt=True)
+    return headers
 
 
-def load_json(path: Path) -> dict | None:
-    if path.exists():
-        return json.loads(path.read_text(encoding="utf-8"))
-    return None
+def _not_modified(request: Request, etag: str, last_modified: float | None = None) -> bool:
+    """Evaluate If-None-Match (preferred) or If-Modified-Since against the current validators."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return int(last_modified) <= since.timestamp()
+    return False
 
 
-def load_text(path: Path) -> str | None:
-    if path.exists():
-        return path.read_text(encoding="utf-8").strip()
-    return None
+def _combined_validators(*documents: Document | None, extra: str = "") -> tuple[str, float | None]:
+    """ETag and Last-Modified for a response built from several documents."""
+    parts = [doc.etag if doc else "-" for doc in documents] + [extra]
+    etag = '"' + hashlib.sha1("|".join(parts).encode()).hexdigest()[:20] + '"'
+    mtimes = [doc.mtime for doc in documents if doc]
+    return etag, max(mtimes) if mtimes else None
+
+
+def _document_response(
+    request: Request,
+    document: Document,
+    media_type: str,
+    filename: str,
+    content: bytes | None = None,
+) -> Response:
+    headers = _cache_headers(document.etag, document.mtime)
+    if _not_modified(request, document.etag, document.mtime):
+        return Response(status_code=304, headers=headers)
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return Response(content=document.raw if content is None else content, media_type=media_type, headers=headers)
 
 
 @functools.lru_cache(maxsize=128)
@@ -72,26 +118,55 @@ def _parse_text_blocks(text: str) -> list[dict]:
     return blocks
 
 
+def _version_response(project_id: str, kind: str, version: int) -> Response:
+    """A specific stored version; versions never change, so they may be cached indefinitely."""
+    raw = store.read_version(project_id, kind, version)
+    if raw is None:
+        return JSONResponse({"error": "Not found"}, status_code=404)
+    return Response(
+        content=raw,
+        media_type="application/json",
+        headers={
+            "Cache-Control": "public, max-age=31536000, immutable",
+            "Content-Disposition": f'attachment; filename="{project_id}_{kind}_v{version}.json"',
+        },
+    )
+
+
 # ─── API Routes ──────────────────────────────────────────────
 
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
     projects = get_projects()
+    etag = output_index.listing_etag
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=_cache_headers(etag))
     return templates.TemplateResponse("index.html", {
         "request": request,
         "projects": projects,
-    })
+    }, headers=_cache_headers(etag))
 
 
 @app.get("/project/{project_id}", response_class=HTMLResponse)
 async def project_detail(request: Request, project_id: str):
-    output = load_json(OUTPUTS_DIR / project_id / "output.json")
-    evaluation = load_json(OUTPUTS_DIR / project_id / "evaluation.json")
-    reference = load_text(REFERENCES_DIR / f"{project_id}.txt")
+    output_doc = output_index.output(project_id)
+    evaluation_doc = output_index.evaluation(project_id)
+    reference_doc = output_index.reference(project_id)
 
-    if not output:
+    if not output_doc or not output_doc.value:
         return HTMLResponse(content="Project not found", status_code=404)
 
+    # The sidebar lists all projects, so the page also changes with the listing
+    etag, last_modified = _combined_validators(
+        output_doc, evaluation_doc, reference_doc, extra=output_index.listing_etag,
+    )
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=_cache_headers(etag, last_modified))
+
+    output = output_doc.value
+    evaluation = evaluation_doc.value if evaluation_doc else None
+    reference = reference_doc.value if reference_doc else None
+
     # Preprocess project_page texts into rendering blocks so templates stay presentation-only
     project_page_blocks = {}
     if output.get('project_page'):
@@ -115,37 +190,251 @@ async def project_detail(request: Request, project_id: str):
         "evaluation": evaluation,
         "reference": reference,
         "projects": get_projects(),
-    })
+    }, headers=_cache_headers(etag, last_modified))
 
 
 @app.get("/api/project/{project_id}/output")
-async def download_output(project_id: str):
-    data = load_json(OUTPUTS_DIR / project_id / "output.json")
-    if not data:
+async def download_output(request: Request, project_id: str, version: int | None = None):
+    if version is not None:
+        return _version_response(project_id, "output", version)
+    document = output_index.output(project_id)
+    if not document or not document.value:
         return JSONResponse({"error": "Not found"}, status_code=404)
-    return JSONResponse(
-        content=data,
-        headers={"Content-Disposition": f'attachment; filename="{project_id}_output.json"'},
-    )
+    return _document_response(request, document, "application/json", f"{project_id}_output.json")
 
 
 @app.get("/api/project/{project_id}/evaluation")
-async def download_evaluation(project_id: str):
-    data = load_json(OUTPUTS_DIR / project_id / "evaluation.json")
-    if not data:
+async def download_evaluation(request: Request, project_id: str, version: int | None = None):
+    if version is not None:
+        return _version_response(project_id, "evaluation", version)
+    document = output_index.evaluation(project_id)
+    if not document or not document.value:
         return JSONResponse({"error": "Not found"}, status_code=404)
-    return JSONResponse(
-        content=data,
-        headers={"Content-Disposition": f'attachment; filename="{project_id}_evaluation.json"'},
-    )
+    return _document_response(request, document, "application/json", f"{project_id}_evaluation.json")
+
+
+@app.get("/api/project/{project_id}/history")
+async def project_history(project_id: str):
+    """Stored versions of a project's output and evaluation, newest first (full history with the SQLite backend)."""
+    history = {kind: store.history(project_id, kind) for kind in ("output", "evaluation")}
+    if not history["output"]:
+        return JSONResponse({"error": "Not found"}, status_code=404)
+    return JSONResponse(history)
 
 
 @app.get("/api/project/{project_id}/reference")
-async def download_reference(project_id: str):
-    text = load_text(REFERENCES_DIR / f"{project_id}.txt")
-    if not text:
+async def download_reference(request: Request, project_id: str):
+    document = output_index.reference(project_id)
+    if not document or not document.value:
         return PlainTextResponse("Not found", status_code=404)
-    return PlainTextResponse(
-        content=text,
-        headers={"Content-Disposition": f'attachment; filename="{project_id}_reference.txt"'},
+    return _document_response(
+        request, document, "text/plain; charset=utf-8", f"{project_id}_reference.txt",
+        content=document.value.encode("utf-8"),
     )
+
+
+# ─── Leaderboard ─────────────────────────────────────────────
+
+@app.get("/leaderboard", response_class=HTMLResponse)
+async def leaderboard_page(
+    request: Request,
+    sort: str = "rouge_l",
+    order: str = "asc",
+    page: int = 1,
+    per_page: int = 50,
+):
+    try:
+        result = leaderboard.page(sort=sort, order=order, page=page, per_page=per_page)
+    except ValueError as e:
+        return HTMLResponse(content=str(e), status_code=400)
+    etag = leaderboard.etag
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=_cache_headers(etag))
+    return templates.TemplateResponse("leaderboard.html", {
+        "request": request,
+        "board": result,
+        "stats": leaderboard.stats(),
+        "metrics": METRICS,
+    }, headers=_cache_headers(etag))
+
+
+@app.get("/api/leaderboard")
+async def leaderboard_api(
+    request: Request,
+    sort: str = "rouge_l",
+    order: str = "asc",
+    page: int = 1,
+    per_page: int = 50,
+):
+    """Per-project scores, sorted and paginated (ascending by default: worst first)."""
+    try:
+        result = leaderboard.page(sort=sort, order=order, page=page, per_page=per_page)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    etag = leaderboard.etag
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=_cache_headers(etag))
+    return JSONResponse(result, headers=_cache_headers(etag))
+
+
+@app.get("/api/leaderboard/stats")
+async def leaderboard_stats(request: Request):
+    """Corpus aggregates per metric: mean, min/max, percentiles and histogram."""
+    stats = leaderboard.stats()
+    etag = leaderboard.etag
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=_cache_headers(etag))
+    return JSONResponse(stats, headers=_cache_headers(etag))
+
+
+# ─── Bulk export ─────────────────────────────────────────────
+
+EXPORT_SECTIONS = ("project_page", "faculty_teaser")
+
+
+def _parse_since(value: str) -> float:
+    """Unix timestamp or ISO 8601 date/time (naive values are taken as UTC)."""
+    try:
+        return float(value)
+    except ValueError:
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+
+
+def _filter_texts(texts: dict | None, sections: set[str], languages: set[str] | None) -> dict:
+    """Keep the selected sections and languages of a section -> language mapping."""
+    return {
+        section: {
+            lang: value for lang, value in (texts.get(section) or {}).items()
+            if languages is None or lang in languages
+        }
+        for section in EXPORT_SECTIONS
+        if section in sections and isinstance(texts, dict)
+    }
+
+
+def _export_records(sections: set[str], languages: set[str] | None, since: float | None):
+    """Yield one filtered record per project, reading a single project at a time."""
+    for project_id in store.list_projects():
+        output_stat = store.stat(project_id, "output")
+        if output_stat is None:
+            continue
+        evaluation_stat = store.stat(project_id, "evaluation")
+        modified = max(output_stat.mtime, evaluation_stat.mtime if evaluation_stat else 0.0)
+        if since is not None and modified <= since:
+            continue
+
+        raw_output = store.read(project_id, "output")
+        raw_evaluation = store.read(project_id, "evaluation") if evaluation_stat else None
+        try:
+            output = json.loads(raw_output) if raw_output else None
+            evaluation = json.loads(raw_evaluation) if raw_evaluation else None
+        except ValueError:
+            continue
+        if not output:
+            continue
+
+        output = {
+            **{k: v for k, v in output.items() if k not in EXPORT_SECTIONS},
+            **_filter_texts(output, sections, languages),
+        }
+        if output.get("quality"):
+            output["quality"] = _filter_texts(output["quality"], sections, languages)
+        if evaluation and evaluation.get("per_text"):
+            evaluation = {**evaluation, "per_text": _filter_texts(evaluation["per_text"], sections, languages)}
+
+        yield {
+            "project_id": project_id,
+            "modified_at": datetime.fromtimestamp(modified, timezone.utc).isoformat(),
+            "output": output,
+            "evaluation": evaluation,
+        }
+
+
+def _ndjson_stream(records):
+    for record in records:
+        yield (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class _ZipChunks:
+    """Write-only sink for zipfile; the bytes written so far are taken out after each entry."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def _zip_stream(records):
+    # zipfile falls back to data descriptors on a non-seekable sink, so no entry is ever rewound
+    sink = _ZipChunks()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for record in records:
+            project_id = record["project_id"]
+            archive.writestr(f"{project_id}/output.json", json.dumps(record["output"], indent=2, ensure_ascii=False))
+            if record["evaluation"]:
+                archive.writestr(f"{project_id}/evaluation.json", json.dumps(record["evaluation"], indent=2, ensure_ascii=False))
+            yield sink.take()
+    yield sink.take()
+
+
+@app.get("/api/export")
+async def export(
+    format: str = "ndjson",
+    lang: list[str] | None = Query(None),
+    section: list[str] | None = Query(None),
+    since: str | None = None,
+):
+    """
+    Stream all (or filtered) projects as NDJSON (one project per line) or as a ZIP archive.
+    - lang / section: repeatable filters, e.g. ?lang=de&section=project_page
+    - since: only projects whose output or evaluation changed after this time
+      (Unix timestamp or ISO 8601); use the X-Export-Started-At header of the
+      previous export for incremental syncs.
+    """
+    if format not in ("ndjson", "zip"):
+        return JSONResponse({"error": "format must be 'ndjson' or 'zip'"}, status_code=400)
+    sections = set(section or EXPORT_SECTIONS)
+    if not sections <= set(EXPORT_SECTIONS):
+        return JSONResponse({"error": f"section must be one of {', '.join(EXPORT_SECTIONS)}"}, status_code=400)
+    try:
+        since_ts = _parse_since(since) if since else None
+    except ValueError:
+        return JSONResponse({"error": "since must be a Unix timestamp or an ISO 8601 date"}, status_code=400)
+
+    started_at = time.time()
+    records = _export_records(sections, set(lang) if lang else None, since_ts)
+    headers = {
+        "Cache-Control": "no-store",
+        "X-Export-Started-At": datetime.fromtimestamp(started_at, timezone.utc).isoformat(),
+    }
+    if format == "zip":
+        headers["Content-Disposition"] = 'attachment; filename="export.zip"'
+        return StreamingResponse(_zip_stream(records), media_type="application/zip", headers=headers)
+    return StreamingResponse(_ndjson_stream(records), media_type="application/x-ndjson", headers=headers)
+
+
+# ─── Usage metrics ───────────────────────────────────────────
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Token usage and latency from the usage ledger, in Prometheus text format."""
+    return PlainTextResponse(usage_ledger.prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/metrics")
+async def metrics_summary():
+    """JSON summary: per-model totals, latency percentiles and rolling throughput."""
+    return JSONResponse(usage_ledger.summary())
@@ -0,0 +1,259 @@
+"""
+Offline pipeline benchmark against the local stub LLM server.
+
+Starts benchmarks/stub_llm_server.py on a free port, points llm.client at it
+and runs the generation pipeline at several concurrency levels:
+
+- tool:    generate_project_text with synthetic requests
+- adapter: generate_project_text_from_project_id on a synthetic catalog
+
+Reported per level: p50/p95 latency, requests/sec, failed requests, transport
+retries, the adaptive LLM concurrency limit at the end of the level and peak RSS. Outputs, cache, ledger and catalog go to a temporary
+directory, so nothing under src/ is touched and no network access is needed.
+
+With --evaluate every request gets a reference text and the background
+LangCheck evaluations are awaited and timed as well. This needs the LangCheck
+models to be available locally (e.g. a populated Hugging Face cache).
+
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --concurrency 1,8,32 --requests 64 --latency 0.5 --tokens-per-second 300
+    python benchmarks/bench_pipeline.py --failure-rate 0.1 --stream --json results.json --max-p95 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "src"))
+
+from utils import percentile  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process (high-water mark since start)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _configure_environment(workdir: Path, args):
+    """Redirect all on-disk state to workdir. Must run before the src modules are imported."""
+    os.environ["OUTPUT_DIR"] = str(workdir / "outputs")
+    os.environ["LLM_CACHE_DIR"] = str(workdir / "cache")
+    os.environ["EXCEL_PATH"] = str(workdir / "projects.xlsx")
+    os.environ.setdefault("LLM_BACKOFF_BASE", str(args.backoff_base))
+    os.environ.setdefault("GWDG_API_KEY", "stub")
+
+
+def _write_catalog(path: Path, count: int):
+    import pandas as pd
+    rows = [
+        {
+            "Abkürzung": f"BENCH{i}",
+            "Beschreibung": f"Benchmark project {i} studies topic {i} with partners in region {i % 7}. " * 12,
+            "Kooperationspartner": f"Partner {i % 5}; Partner {i % 3}",
+            "Organisationseinheiten der Projektleitungen": f"Institute {i % 4}",
+        }
+        for i in range(count)
+    ]
+    pd.DataFrame(rows).to_excel(path, index=False)
+
+
+def _start_stub(port: int, args) -> subprocess.Popen:
+    command = [
+        sys.executable, str(BENCH_DIR / "stub_llm_server.py"),
+        "--port", str(port),
+        "--latency", str(args.latency),
+        "--jitter", str(args.jitter),
+        "--tokens-per-second", str(args.tokens_per_second),
+        "--failure-rate", str(args.failure_rate),
+        "--failure-status", str(args.failure_status),
+        "--seed", str(args.seed),
+    ]
+    process = subprocess.Popen(command)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Stub LLM server exited during start-up.")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/v1/models", timeout=1).raise_for_status()
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Stub LLM server did not start within 30 seconds.")
+
+
+async def _run_level(target: str, concurrency: int, count: int, args, reference: str | None) -> dict:
+    import tools
+    from schemas import CacheMode, GenerateProjectTextInput
+    from transport import transport
+    from ratelimit import rate_limiter
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    failed = 0
+    retries_before = transport.retries
+
+    async def one(i: int):
+        nonlocal failed
+        project_id = f"BENCH{i % args.catalog_size}"
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                if target == "adapter":
+                    await tools.generate_project_text_from_project_id(
+                        project_id, cache_mode=CacheMode.bypass, stream=args.stream, fan_out=args.fan_out,
+                    )
+                else:
+                    request = GenerateProjectTextInput(
+                        project_id=project_id,
+                        project_description=f"Benchmark project {i} studies topic {i}. " * 12,
+                        keywords=[f"keyword-{i}", "research"],
+                        target_audience=["industry", "general_public"],
+                        languages=["de", "en"],
+                    )
+                    await tools.generate_project_text(
+                        request, reference_text=reference, cache_mode=CacheMode.bypass,
+                        stream=args.stream, fan_out=args.fan_out,
+                    )
+            except Exception:
+                failed += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    wall_clock = time.perf_counter() - started
+
+    evaluation_seconds = None
+    if reference is not None:
+        eval_started = time.perf_counter()
+        await tools.wait_for_evaluations()
+        evaluation_seconds = time.perf_counter() - eval_started
+
+    latencies.sort()
+    return {
+        "target": target,
+        "concurrency": concurrency,
+        "requests": count,
+        "failed": failed,
+        "p50_seconds": percentile(latencies, 0.5),
+        "p95_seconds": percentile(latencies, 0.95),
+        "requests_per_second": len(latencies) / wall_clock if wall_clock else None,
+        "retries": transport.retries - retries_before,
+        "llm_concurrency_limit": rate_limiter.limit,
+        "evaluation_drain_seconds": evaluation_seconds,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _print_row(row: dict):
+    def fmt(value, spec):
+        return format(value, spec) if value is not None else "–"
+    print(
+        f"{row['target']:<8} {row['concurrency']:>5} {row['requests']:>5} {row['failed']:>6} "
+        f"{fmt(row['p50_seconds'], '8.3f')} {fmt(row['p95_seconds'], '8.3f')} "
+        f"{fmt(row['requests_per_second'], '8.2f')} {row['retries']:>7} {row['llm_concurrency_limit']:>6.1f} "
+        f"{fmt(row['evaluation_drain_seconds'], '8.2f')} {row['peak_rss_mb']:>9.1f}"
+    )
+
+
+async def _run(args, port: int) -> list[dict]:
+    import logging
+    from openai import AsyncOpenAI
+    import llm
+    import storage
+    from transport import build_http_client
+
+    logging.getLogger().setLevel(logging.WARNING)
+    llm.client = AsyncOpenAI(
+        api_key="stub",
+        base_url=f"http://127.0.0.1:{port}/v1",
+        http_client=build_http_client(),
+        max_retries=0,
+    )
+
+    reference = None
+    if args.evaluate:
+        reference = "Reference text for the benchmark project describing its goals, partners and results. " * 8
+        # The adapter loads references by project ID
+        storage.REFERENCES_DIR = Path(os.environ["OUTPUT_DIR"]).parent / "references"
+        storage.REFERENCES_DIR.mkdir(parents=True, exist_ok=True)
+        for i in range(args.catalog_size):
+            (storage.REFERENCES_DIR / f"BENCH{i}.txt").write_text(reference, encoding="utf-8")
+
+    print(f"\n{'target':<8} {'conc':>5} {'reqs':>5} {'failed':>6} {'p50 s':>8} {'p95 s':>8} "
+          f"{'req/s':>8} {'retries':>7} {'limit':>6} {'eval s':>8} {'peakRSS MB':>9}")
+    rows = []
+    for target in args.targets.split(","):
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            row = await _run_level(target.strip(), concurrency, args.requests, args, reference)
+            _print_row(row)
+            rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", default="tool,adapter", help="Comma-separated: tool, adapter.")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels.")
+    parser.add_argument("--requests", type=int, default=32, help="Requests per concurrency level.")
+    parser.add_argument("--catalog-size", type=int, default=50, help="Projects in the synthetic catalog.")
+    parser.add_argument("--stream", action="store_true", help="Use streamed generation.")
+    parser.add_argument("--fan-out", action="store_true", help="Request each section/language separately.")
+    parser.add_argument("--evaluate", action="store_true", help="Also run and time the background evaluations.")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub: seconds until the first token.")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Stub: ± latency jitter (seconds).")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Stub: completion token rate (0 = instant).")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Stub: fraction of failed requests.")
+    parser.add_argument("--failure-status", type=int, default=500, help="Stub: HTTP status of injected failures.")
+    parser.add_argument("--seed", type=int, default=1, help="Stub: random seed.")
+    parser.add_argument("--backoff-base", type=float, default=0.05, help="LLM_BACKOFF_BASE unless already set.")
+    parser.add_argument("--json", type=Path, help="Write the results to this JSON file.")
+    parser.add_argument("--max-p95", type=float, help="Exit with status 1 if any level's p95 exceeds this (seconds).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-pipeline-") as tmp:
+        workdir = Path(tmp)
+        _configure_environment(workdir, args)
+        _write_catalog(workdir / "projects.xlsx", args.catalog_size)
+
+        port = _free_port()
+        stub = _start_stub(port, args)
+        try:
+            rows = asyncio.run(_run(args, port))
+        finally:
+            stub.terminate()
+            stub.wait(timeout=10)
+
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.json}")
+
+    if args.max_p95 is not None:
+        slow = [r for r in rows if r["p95_seconds"] is None or r["p95_seconds"] > args.max_p95]
+        if slow:
+            print(f"\np95 budget of {args.max_p95}s exceeded at "
+                  + ", ".join(f"{r['target']}@{r['concurrency']}" for r in slow))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
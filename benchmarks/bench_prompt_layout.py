@@ -0,0 +1,114 @@
+"""
+Prompt layout benchmark: prompt tokens and time-to-first-token (TTFT) for
+
+- before: one system message with the project's source text ahead of the
+  static instructions (the previous layout),
+- after:  the static system message from context.build_context followed by
+  the per-project user message.
+
+Each project is sent in both layouts with a small max_tokens, alternating the
+order, against the endpoint configured in .env (GWDG_API_BASE). Backends with
+prefix caching (e.g. vLLM with --enable-prefix-caching) should show a lower
+TTFT and, if they report it, cached prompt tokens for the "after" layout.
+
+    python benchmarks/bench_prompt_layout.py --projects 20
+    python benchmarks/bench_prompt_layout.py --synthetic 20
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from context import build_context  # noqa: E402
+from schemas import GenerateProjectTextInput  # noqa: E402
+import llm  # noqa: E402
+from utils import percentile  # noqa: E402
+
+
+def _legacy_layout(messages: list[dict]) -> list[dict]:
+    """Variable source text first, static instructions after it, in one system message."""
+    system, user = messages[0]["content"], messages[1]["content"]
+    return [{"role": "system", "content": f"{user}\n\n{system}"}]
+
+
+def _requests(args) -> list[GenerateProjectTextInput]:
+    if args.synthetic:
+        return [
+            GenerateProjectTextInput(
+                project_id=f"SYN{i}",
+                project_description=f"Synthetic project {i} studies topic {i} with partners in region {i % 7}. " * 12,
+                keywords=[f"keyword-{i}", "research"],
+                target_audience=["industry", "general_public"],
+                languages=["de", "en"],
+            )
+            for i in range(args.synthetic)
+        ]
+
+    from resources import catalog
+    from tools import _build_request_from_project
+    return [_build_request_from_project(p) for p in catalog.records()[:args.projects]]
+
+
+async def _measure(messages: list[dict], max_tokens: int) -> dict:
+    started = time.perf_counter()
+    ttft = None
+    usage = None
+    stream = await llm.get_client().chat.completions.create(
+        model=llm.model,
+        messages=messages,
+        temperature=llm.temperature,
+        max_tokens=max_tokens,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    async for chunk in stream:
+        if ttft is None and chunk.choices and chunk.choices[0].delta.content:
+            ttft = time.perf_counter() - started
+        if chunk.usage:
+            usage = chunk.usage
+    details = getattr(usage, "prompt_tokens_details", None) if usage else None
+    return {
+        "ttft": ttft if ttft is not None else time.perf_counter() - started,
+        "prompt_tokens": usage.prompt_tokens if usage else None,
+        "cached_tokens": getattr(details, "cached_tokens", None) if details else None,
+    }
+
+
+def _report(name: str, rows: list[dict]):
+    ttfts = sorted(r["ttft"] for r in rows)
+    tokens = [r["prompt_tokens"] for r in rows if r["prompt_tokens"] is not None]
+    cached = [r["cached_tokens"] for r in rows if r["cached_tokens"] is not None]
+    p95 = percentile(ttfts, 0.95)
+    print(
+        f"{name:<7} TTFT p50 {percentile(ttfts, 0.5) * 1000:7.0f} ms  p95 {p95 * 1000:7.0f} ms  "
+        f"prompt tokens {statistics.mean(tokens) if tokens else float('nan'):7.0f}  "
+        f"cached {statistics.mean(cached) if cached else float('nan'):7.0f}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, default=20, help="Number of catalog projects to send.")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N synthetic projects instead of the Excel catalog.")
+    parser.add_argument("--max-tokens", type=int, default=8, help="Completion tokens per request (only TTFT matters).")
+    args = parser.parse_args()
+
+    results = {"before": [], "after": []}
+    for i, request in enumerate(_requests(args)):
+        messages = build_context(request)
+        layouts = [("before", _legacy_layout(messages)), ("after", messages)]
+        # Alternate the order so neither layout always runs on a warmer server
+        for name, layout in layouts if i % 2 == 0 else reversed(layouts):
+            results[name].append(await _measure(layout, args.max_tokens))
+
+    for name, rows in results.items():
+        if rows:
+            _report(name, rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,197 @@
+"""
+Start-up benchmark for the stdio MCP server.
+
+- import time: runs `python -X importtime -c "import server"` and reports the
+  total and the slowest top-level imports.
+- time-to-ready: spawns `python src/server.py`, sends the MCP `initialize`
+  request over stdio and measures the time until the response arrives.
+- eager imports: starts the server once more, completes the handshake, waits
+  --settle-seconds and records `sys.modules` of the running process when it
+  exits, so imports made by background threads after start-up count as well.
+  The heavy dependencies (pandas, langcheck, torch, transformers, openai,
+  pyarrow) must not be among them.
+
+Exits with status 1 if a heavy module is imported eagerly or a budget is
+exceeded, so it can run in CI:
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --import-budget-ms 800 --ready-budget-ms 1500
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+# Must only be imported on first use, never while the server starts
+LAZY_MODULES = ("pandas", "langcheck", "torch", "transformers", "openai", "pyarrow")
+
+# Runs server.py as __main__ and writes its sys.modules to BENCH_MODULES_FILE on exit
+_MODULES_BOOTSTRAP = """
+import atexit, json, os, runpy, sys
+atexit.register(lambda: json.dump(sorted(sys.modules), open(os.environ["BENCH_MODULES_FILE"], "w")))
+sys.argv = [os.environ["BENCH_SERVER"]]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+_INITIALIZE = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2025-06-18",
+        "capabilities": {},
+        "clientInfo": {"name": "bench_startup", "version": "0"},
+    },
+}
+
+
+def _environment() -> dict:
+    env = {**os.environ, "PYTHONPATH": str(SRC_DIR), "EVAL_PRELOAD_MODELS": "0"}
+    env.pop("PROFILE", None)
+    return env
+
+
+def _import_times() -> list[tuple[str, int, int]]:
+    """(module, self µs, cumulative µs) for every import made by `import server`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        cwd=SRC_DIR, env=_environment(), capture_output=True, text=True, check=True,
+    )
+    return _parse_import_times(result.stderr)
+
+
+def _parse_import_times(stderr: str) -> list[tuple[str, int, int]]:
+    """
+    Rows of `-X importtime` output. Each name follows "| " and nested imports
+    are indented by two more spaces, so only the separator's space is removed.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|", 2)
+        rows.append((name.removeprefix(" ").rstrip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def _report_imports(rows: list[tuple[str, int, int]], top: int) -> float:
+    # Top-level entries (no indentation) add up to the total import time
+    top_level = [(name, cumulative) for name, _, cumulative in rows if not name.startswith(" ")]
+    total_ms = sum(cumulative for _, cumulative in top_level) / 1000
+
+    print(f"Import time of `import server`: {total_ms:.0f} ms ({len(rows)} modules)")
+    for name, cumulative in sorted(top_level, key=lambda r: r[1], reverse=True)[:top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+    return total_ms
+
+
+async def _send(process: asyncio.subprocess.Process, message: dict):
+    process.stdin.write((json.dumps(message) + "\n").encode("utf-8"))
+    await process.stdin.drain()
+
+
+async def _initialize(process: asyncio.subprocess.Process, timeout: float):
+    """Send `initialize` and wait for its response."""
+    await _send(process, _INITIALIZE)
+    while True:
+        line = await asyncio.wait_for(process.stdout.readline(), timeout)
+        if not line:
+            raise RuntimeError("Server exited before answering initialize.")
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if message.get("id") == 1:
+            if "error" in message:
+                raise RuntimeError(f"initialize failed: {message['error']}")
+            return
+
+
+async def _time_to_ready(timeout: float) -> float:
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, str(SRC_DIR / "server.py"),
+        cwd=SRC_DIR.parent, env=_environment(),
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+    )
+    try:
+        await _initialize(process, timeout)
+        return time.perf_counter() - started
+    finally:
+        if process.returncode is None:
+            process.kill()
+        await process.wait()
+
+
+async def _running_server_modules(settle: float, timeout: float) -> set[str]:
+    """Modules loaded by the running server after the handshake and `settle` idle seconds."""
+    with tempfile.TemporaryDirectory() as tmp:
+        modules_file = Path(tmp) / "modules.json"
+        env = {**_environment(), "BENCH_MODULES_FILE": str(modules_file), "BENCH_SERVER": str(SRC_DIR / "server.py")}
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-c", _MODULES_BOOTSTRAP,
+            cwd=SRC_DIR.parent, env=env,
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            await _initialize(process, timeout)
+            await _send(process, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+            await asyncio.sleep(settle)
+            # End of input shuts the stdio server down normally, which runs the atexit hook
+            process.stdin.close()
+            await asyncio.wait_for(process.wait(), timeout)
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+        if not modules_file.exists():
+            raise RuntimeError("Server exited without reporting its modules.")
+        return set(json.loads(modules_file.read_text()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Server starts to measure time-to-ready.")
+    parser.add_argument("--top", type=int, default=15, help="Slowest top-level imports to list.")
+    parser.add_argument("--import-budget-ms", type=float, default=1500, help="Budget for `import server`.")
+    parser.add_argument("--ready-budget-ms", type=float, default=2500, help="Budget for the median time-to-ready.")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds to wait for the initialize response.")
+    parser.add_argument("--settle-seconds", type=float, default=2.0,
+                        help="Idle time after the handshake before the running server's modules are read.")
+    args = parser.parse_args()
+
+    failures = []
+    total_ms = _report_imports(_import_times(), args.top)
+    if total_ms > args.import_budget_ms:
+        failures.append(f"import time {total_ms:.0f} ms exceeds budget {args.import_budget_ms:.0f} ms")
+
+    ready = sorted(asyncio.run(_time_to_ready(args.timeout)) * 1000 for _ in range(max(1, args.runs)))
+    median = statistics.median(ready)
+    print(f"\nTime to ready (initialize response), {len(ready)} runs: "
+          f"median {median:.0f} ms, min {ready[0]:.0f} ms, max {ready[-1]:.0f} ms")
+    if median > args.ready_budget_ms:
+        failures.append(f"median time-to-ready {median:.0f} ms exceeds budget {args.ready_budget_ms:.0f} ms")
+
+    modules = asyncio.run(_running_server_modules(args.settle_seconds, args.timeout))
+    eager = sorted(m for m in LAZY_MODULES if m in modules)
+    print(f"\nModules loaded by the idle server after {args.settle_seconds:.1f} s: {len(modules)}"
+          f"{' (heavy: ' + ', '.join(eager) + ')' if eager else ''}")
+    if eager:
+        failures.append(f"imported eagerly at start-up: {', '.join(eager)}")
+
+    if failures:
+        print("\nFAILED: " + "; ".join(failures))
+        sys.exit(1)
+    print("\nWithin budget.")
+
+
+if __name__ == "__main__":
+    main()
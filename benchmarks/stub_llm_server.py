@@ -0,0 +1,217 @@
+"""
+Local OpenAI-compatible chat-completions stub for offline benchmarks.
+
+Answers POST /v1/chat/completions (streamed and non-streamed) with a valid
+JSON document shaped like the response_format schema the pipeline sends
+(full document or a single section/language entry). Latency, token rate
+and failures are configurable, so throughput and retry behaviour can be
+measured without network access or API quota.
+
+    python benchmarks/stub_llm_server.py --port 8765 --latency 0.3 --tokens-per-second 200 --failure-rate 0.05
+
+bench_pipeline.py starts this server itself; running it by hand is only
+needed to point the MCP server or another tool at it (GWDG_API_BASE=http://127.0.0.1:8765/v1).
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+import zlib
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Words per generated text, matching the lengths the prompt asks for
+WORDS = {"project_page": 350, "faculty_teaser": 75, "entry": 200}
+CHUNK_CHARS = 16
+
+app = FastAPI()
+app.state.latency = 0.2
+app.state.jitter = 0.0
+app.state.tokens_per_second = 0.0
+app.state.failure_rate = 0.0
+app.state.failure_status = 500
+app.state.rng = random.Random()
+app.state.requests = 0
+app.state.failures = 0
+
+
+#-------------------------
+# RESPONSE CONTENT
+#-------------------------
+
+def _tokens(text: str) -> int:
+    """Rough token estimate (4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def _text(words: int, seed: int) -> str:
+    rng = random.Random(seed)
+    vocabulary = ("Forschung", "Projekt", "Partner", "Ergebnisse", "research", "project",
+                  "industry", "region", "data", "innovation", "students", "society")
+    sentences, count = [], 0
+    while count < words:
+        length = rng.randint(8, 16)
+        sentences.append(" ".join(rng.choice(vocabulary) for _ in range(length)).capitalize() + ".")
+        count += length
+    return " ".join(sentences)
+
+
+def _entry(words: int, seed: int, with_warnings: bool) -> dict:
+    text = _text(words, seed)
+    entry = {"text": text, "reading_level": "beginner", "word_count": len(text.split())}
+    if with_warnings:
+        entry["warnings"] = []
+    return entry
+
+
+def _content(body: dict) -> str:
+    """Build a JSON answer that matches the requested response_format schema."""
+    seed = zlib.crc32(json.dumps(body.get("messages", []), sort_keys=True).encode("utf-8"))
+    schema_spec = (body.get("response_format") or {}).get("json_schema") or {}
+    schema = schema_spec.get("schema") or {}
+    properties = schema.get("properties", {})
+
+    if "project_page" not in properties and "text" in properties:
+        return json.dumps(_entry(WORDS["entry"], seed, "warnings" in properties), ensure_ascii=False)
+
+    languages = list(properties.get("project_page", {}).get("properties", {})) or ["de", "en"]
+    document = {
+        section: {lang: _entry(WORDS[section], seed + i, False) for i, lang in enumerate(languages)}
+        for section in ("project_page", "faculty_teaser")
+    }
+    document["used_keywords"] = []
+    document["warnings"] = []
+    return json.dumps(document, ensure_ascii=False)
+
+
+#-------------------------
+# ENDPOINTS
+#-------------------------
+
+def _failure() -> JSONResponse | None:
+    state = app.state
+    if state.rng.random() >= state.failure_rate:
+        return None
+    state.failures += 1
+    headers = {"retry-after-ms": "50"} if state.failure_status == 429 else None
+    return JSONResponse(
+        {"error": {"message": "Injected failure", "type": "stub_error", "code": state.failure_status}},
+        status_code=state.failure_status,
+        headers=headers,
+    )
+
+
+async def _first_token_delay():
+    state = app.state
+    await asyncio.sleep(max(0.0, state.latency + state.rng.uniform(-state.jitter, state.jitter)))
+
+
+def _usage(body: dict, content: str) -> dict:
+    prompt_tokens = sum(_tokens(str(m.get("content", ""))) for m in body.get("messages", []))
+    completion_tokens = _tokens(content)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+@app.get("/v1/models")
+async def models():
+    return {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "stub"}]}
+
+
+@app.get("/stats")
+async def stats():
+    return {"requests": app.state.requests, "failures": app.state.failures}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    app.state.requests += 1
+    if (failure := _failure()) is not None:
+        return failure
+
+    content = _content(body)
+    usage = _usage(body, content)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    created = int(time.time())
+    model = body.get("model", "stub")
+    tokens_per_second = app.state.tokens_per_second
+
+    if not body.get("stream"):
+        await _first_token_delay()
+        if tokens_per_second > 0:
+            await asyncio.sleep(usage["completion_tokens"] / tokens_per_second)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        }
+
+    include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+    def chunk(delta: dict, finish_reason: str | None = None, usage_block: dict | None = None) -> str:
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [] if usage_block else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        if usage_block:
+            payload["usage"] = usage_block
+        return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    async def events():
+        await _first_token_delay()
+        yield chunk({"role": "assistant", "content": ""})
+        delay = (CHUNK_CHARS / 4) / tokens_per_second if tokens_per_second > 0 else 0.0
+        for start in range(0, len(content), CHUNK_CHARS):
+            if delay:
+                await asyncio.sleep(delay)
+            yield chunk({"content": content[start:start + CHUNK_CHARS]})
+        yield chunk({}, finish_reason="stop")
+        if include_usage:
+            yield chunk({}, usage_block=usage)
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds until the first token.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform ± jitter on the latency (seconds).")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Completion token rate (0 = instant).")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with an error.")
+    parser.add_argument("--failure-status", type=int, default=500, help="HTTP status of injected failures (e.g. 500, 429).")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for latency jitter and failure injection.")
+    args = parser.parse_args()
+
+    app.state.latency = args.latency
+    app.state.jitter = args.jitter
+    app.state.tokens_per_second = args.tokens_per_second
+    app.state.failure_rate = args.failure_rate
+    app.state.failure_status = args.failure_status
+    app.state.rng = random.Random(args.seed)
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from utils import env_flag
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = Path(os.getenv("LLM_CACHE_DIR", PROJECT_ROOT / "src/cache/llm"))
+CACHE_MAX_BYTES = int(float(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024)
+CACHE_MAX_AGE_SECONDS = float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "30")) * 86400
+CACHE_ENABLED = env_flag("LLM_CACHE_ENABLED", True)
+# Full directory scans (expired entries, entries written by other processes) at most this often
+CACHE_SCAN_INTERVAL_SECONDS = float(os.getenv("LLM_CACHE_SCAN_INTERVAL_SECONDS", "3600"))
+
+
+#-------------------------
+# LLM RESPONSE CACHE
+# Content-addressed, on-disk, LRU by file mtime
+#-------------------------
+
+class ResponseCache:
+    """
+    Persistent cache of LLM responses keyed on a hash of (model, temperature, messages).
+    Each entry is one JSON file; its mtime is bumped on every hit so eviction
+    can drop the least recently used entries once the size or age limit is exceeded.
+
+    The total size is tracked as entries are written and removed, so the
+    directory is only scanned when the size limit is exceeded or
+    scan_interval seconds have passed since the last scan.
+    """
+
+    def __init__(self, directory: Path, *, max_bytes: int, max_age_seconds: float, enabled: bool = True,
+                 scan_interval: float = CACHE_SCAN_INTERVAL_SECONDS):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.enabled = enabled
+        self.scan_interval = scan_interval
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.scans = 0
+        # Size and entry count as of the last scan plus later changes (None: not scanned yet)
+        self._bytes: int | None = None
+        self._count = 0
+        self._scanned_at = 0.0
+
+    @staticmethod
+    def make_key(model: str, temperature: float, messages: list[dict]) -> str:
+        payload = json.dumps(
+            {"model": model, "temperature": temperature, "messages": messages},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        # Two-level fan-out keeps directories small
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> dict | None:
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            st = path.stat()
+            if time.time() - st.st_mtime > self.max_age_seconds:
+                self._remove(path, st.st_size)
+                self.evictions += 1
+                self.misses += 1
+                return None
+            value = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"Discarding unreadable cache entry {path.name}: {e}")
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        # Mark as recently used
+        os.utime(path)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: dict):
+        if not self.enabled:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        tmp_path.write_bytes(data)
+        replaced = self._size(path)
+        os.replace(tmp_path, path)
+        self.writes += 1
+        if self._bytes is not None:
+            self._bytes += len(data) - (replaced or 0)
+            self._count += replaced is None
+        if (
+            self._bytes is None
+            or self._bytes > self.max_bytes
+            or time.monotonic() - self._scanned_at > self.scan_interval
+        ):
+            self.evict()
+
+    def discard(self, key: str):
+        """Remove an entry, e.g. when the cached response turned out to be unusable."""
+        self._remove(self._path(key))
+
+    @staticmethod
+    def _size(path: Path) -> int | None:
+        try:
+            return path.stat().st_size
+        except FileNotFoundError:
+            return None
+
+    def _remove(self, path: Path, size: int | None = None):
+        """Delete an entry and take it off the tracked total."""
+        if size is None:
+            size = self._size(path)
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return
+        if self._bytes is not None and size is not None:
+            self._bytes -= size
+            self._count -= 1
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        if not self.directory.exists():
+            return []
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def evict(self):
+        """
+        Scan the directory: drop expired entries, then least recently used ones
+        until under the size limit, and reset the tracked total.
+        """
+        self.scans += 1
+        now = time.time()
+        live = []
+        for mtime, size, path in self._entries():
+            if now - mtime > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+                self.evictions += 1
+            else:
+                live.append((mtime, size, path))
+
+        total = sum(size for _, size, _ in live)
+        count = len(live)
+        for mtime, size, path in sorted(live):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            count -= 1
+            self.evictions += 1
+
+        self._bytes = total
+        self._count = count
+        self._scanned_at = time.monotonic()
+
+    def stats(self) -> dict:
+        if self._bytes is None:
+            self.evict()
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "scans": self.scans,
+            "entries": self._count,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+response_cache = ResponseCache(
+    CACHE_DIR,
+    max_bytes=CACHE_MAX_BYTES,
+    max_age_seconds=CACHE_MAX_AGE_SECONDS,
+    enabled=CACHE_ENABLED,
+)
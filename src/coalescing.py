@@ -0,0 +1,57 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+#-------------------------
+# SINGLE-FLIGHT COALESCING
+# Concurrent calls with the same key share one execution
+#-------------------------
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time. Callers arriving while a call
+    for their key is in flight await the same task and receive its result
+    (or exception) instead of starting a duplicate.
+
+    The shared work runs as its own task: a caller that is cancelled stops
+    waiting, but the others still get the result.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: dict[str, asyncio.Task] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            logging.info(f"[{self.name}] joining in-flight call for {key[:40]}")
+            return await asyncio.shield(task)
+
+        self.executed += 1
+        task = asyncio.ensure_future(fn())
+        self._in_flight[key] = task
+
+        def _done(t: asyncio.Task):
+            self._in_flight.pop(key, None)
+            # Mark the exception as retrieved even if every caller was cancelled
+            if not t.cancelled():
+                t.exception()
+
+        task.add_done_callback(_done)
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._in_flight),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+        }
+
+
+generation_flights = SingleFlight("generate_project_text")
@@ -1,127 +1,288 @@
+import functools
+import hashlib
+import json
 from schemas import GenerateProjectTextInput
 
+# Bump whenever the prompt blocks or the output format change, so stored
+# generations no longer match their input fingerprint and get regenerated
+PROMPT_TEMPLATE_VERSION = "project-texts-v1"
+
+#-------------------------
+# PROMPT BUILDING BLOCKS
+#-------------------------
+
+_INTRO = """
+You are a science communicator expert writing for an educated general audience
+with no specialist background.
+
+Your task is to rewrite the project description provided in the user message
+into clear, structured texts suitable for a university website.
+"""
+
+_RULES = """
+IMPORTANT RULES:
+- The project description is the PRIMARY source of truth.
+- Preserve concrete entities, tools, technologies, and scenarios when present.
+- Integrate ALL provided keywords naturally into the generated text.
+- Do NOT introduce new concepts beyond what keywords and description provide.
+- Prefer factual consistency over creativity.
+"""
+
+_SECTION_TASKS = {
+    "project_page": """
+Project Page Description
+  - Length: 300–400 words
+  - Write as exactly 4 separate paragraphs — NO section headers or markdown headings.
+  - Separate each paragraph with a blank line (\\n\\n).
+  - Each paragraph covers one topic in order, without labelling it:
+    1. Why the project exists (motivation/background)
+    2. What the project does (research goals)
+    3. Why it matters to society (societal relevance)
+    4. What outcomes are expected (expected impact)
+""",
+    "faculty_teaser": """
+Faculty Teaser
+  - Length: 50–100 words
+  - Concise institutional summary.
+""",
+}
+
+_READING_LEVEL = """
+For EACH text choose:
+- beginner
+- intermediate
+
+Select based on audience and technical density.
+"""
+
+_STYLE_GUIDELINES = """
+- Write for a PUBLIC-FACING university website, NOT an academic paper
+- Use clear, simple language that non-experts can understand
+- Avoid jargon — if technical terms are necessary, briefly explain them
+- Short sentences and paragraphs for easy readability
+- Active voice preferred over passive voice
+- Preserve specific project details when available
+- No unverifiable claims
+- Target reading level: general public with interest in science/technology
+"""
+
+_OUTPUT_FORMAT = """
+{
+  "project_page": {
+    "<language_code>": {
+      "text": "...",
+      "reading_level": "...",
+      "word_count": ...
+    }
+  },
+  "faculty_teaser": {
+    "<language_code>": {
+      "text": "...",
+      "reading_level": "...",
+      "word_count": ...
+    }
+  },
+  "used_keywords": ["..."],
+  "warnings": ["..."]
+}
+
+Replace <language_code> with each requested language.
+
+Return ONLY valid JSON.
+"""
+
+_ENTRY_OUTPUT_FORMAT = """
+{
+  "text": "...",
+  "reading_level": "...",
+  "word_count": ...,
+  "warnings": ["..."]
+}
+
+Return ONLY valid JSON.
+"""
+
+
+#-------------------------
+# STRUCTURED OUTPUT SCHEMAS
+# Sent as response_format when the backend supports JSON schema mode
+#-------------------------
+
+def entry_json_schema(*, with_warnings: bool = False) -> dict:
+    """JSON schema of a single generated text entry."""
+    properties = {
+        "text": {"type": "string"},
+        "reading_level": {"type": "string", "enum": ["beginner", "intermediate"]},
+        "word_count": {"type": "integer"},
+    }
+    if with_warnings:
+        properties["warnings"] = {"type": "array", "items": {"type": "string"}}
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+def output_json_schema(languages: list[str]) -> dict:
+    """JSON schema of the full response for the requested languages."""
+    section = {
+        "type": "object",
+        "properties": {lang: entry_json_schema() for lang in languages},
+        "required": list(languages),
+        "additionalProperties": False,
+    }
+    return {
+        "type": "object",
+        "properties": {
+            "project_page": section,
+            "faculty_teaser": section,
+            "used_keywords": {"type": "array", "items": {"type": "string"}},
+            "warnings": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["project_page", "faculty_teaser", "used_keywords", "warnings"],
+        "additionalProperties": False,
+    }
+
+
+def _heading(title: str) -> str:
+    rule = "─" * 40
+    return f"{rule}\n{title}\n{rule}"
+
+
+def _source_block(request: GenerateProjectTextInput) -> str:
+    keywords = ", ".join(request.keywords) if request.keywords else "None"
+    return (
+        f"{_heading('SOURCE TEXT (EXCEL: Beschreibung)')}\n\n"
+        f"Project description:\n{request.project_description}\n\n"
+        f"Keywords (must appear in the generated text):\n{keywords}"
+    )
+
+
 #-------------------------
 # CONTEXT BUILDING
-#-------------------------  
+# Static instructions go into the system message, compiled once per
+# (audiences, languages) combination, so that every request for the same
+# combination shares a byte-identical prefix for server-side prefix/KV caching.
+# Only the project-specific source text goes into the user message.
+#-------------------------
+
+@functools.lru_cache(maxsize=None)
+def _compile_system_prompt(audiences: tuple[str, ...], languages: tuple[str, ...]) -> str:
+    tasks = "\n\n".join(
+        f"{i}. {task.strip()}" for i, task in enumerate(_SECTION_TASKS.values(), start=1)
+    )
+
+    prompt = "\n".join([
+        _INTRO,
+        _RULES,
+        _heading("TASK"),
+        "\nGenerate TWO texts:\n",
+        tasks,
+        "",
+        _heading("TARGET AUDIENCE"),
+        f"\n{', '.join(audiences)}\n",
+        _heading("LANGUAGES"),
+        f"\nGenerate output in the following languages:\n{', '.join(languages)}\n",
+        _heading("READING LEVEL"),
+        _READING_LEVEL,
+        _heading("STYLE GUIDELINES"),
+        _STYLE_GUIDELINES,
+        _heading("OUTPUT FORMAT (STRICT JSON)"),
+        _OUTPUT_FORMAT,
+    ])
+
+    return prompt.strip()
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_section_system_prompt(section: str, audiences: tuple[str, ...], language: str) -> str:
+    prompt = "\n".join([
+        _INTRO,
+        _RULES,
+        _heading("TASK"),
+        "\nGenerate ONE text:\n",
+        _SECTION_TASKS[section].strip(),
+        "",
+        _heading("TARGET AUDIENCE"),
+        f"\n{', '.join(audiences)}\n",
+        _heading("LANGUAGE"),
+        f"\nWrite the text in this language: {language}\n",
+        _heading("READING LEVEL"),
+        _READING_LEVEL,
+        _heading("STYLE GUIDELINES"),
+        _STYLE_GUIDELINES,
+        _heading("OUTPUT FORMAT (STRICT JSON)"),
+        _ENTRY_OUTPUT_FORMAT,
+    ])
+
+    return prompt.strip()
+
 
-def build_context(request: GenerateProjectTextInput) -> str:
+def build_context(request: GenerateProjectTextInput) -> list[dict]:
     """
     Builds a controlled prompt for public-facing text generation
     based exclusively on high-level project metadata.
     The prompt is designed to guide the LLM in generating structured,
     coherent, and audience-appropriate content.
+    Returns chat messages: the static system prompt followed by the project's source text.
     """
 
-    audiences = ", ".join(a.value for a in request.target_audience)
-    languages = ", ".join(lang.value for lang in request.languages)
-    keywords = ", ".join(request.keywords) if request.keywords else "None"
+    system_prompt = _compile_system_prompt(
+        tuple(a.value for a in request.target_audience),
+        tuple(lang.value for lang in request.languages),
+    )
+
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": _source_block(request)},
+    ]
 
-    prompt = f"""
-    You are a science communicator expert writing for an educated general audience 
-    with no specialist background. 
-
-    Your task is to rewrite the provided project description  into
-    clear, structured texts suitable for a university website.
-
-    ────────────────────────────────────────
-    SOURCE TEXT (EXCEL: Beschreibung)
-    ────────────────────────────────────────
-
-    Project description:
-    {request.project_description}
-
-    Keywords (must appear in the generated text):
-    {keywords}
-
-    IMPORTANT RULES:
-    - The project description is the PRIMARY source of truth.
-    - Preserve concrete entities, tools, technologies, and scenarios when present.
-    - Integrate ALL provided keywords naturally into the generated text.
-    - Do NOT introduce new concepts beyond what keywords and description provide.
-    - Prefer factual consistency over creativity.
-
-    ────────────────────────────────────────
-    TASK
-    ────────────────────────────────────────
-
-    Generate TWO texts:
-
-    1. Project Page Description
-      - Length: 300–400 words
-      - Write as exactly 4 separate paragraphs — NO section headers or markdown headings.
-      - Separate each paragraph with a blank line (\n\n).
-      - Each paragraph covers one topic in order, without labelling it:
-        1. Why the project exists (motivation/background)
-        2. What the project does (research goals)
-        3. Why it matters to society (societal relevance)
-        4. What outcomes are expected (expected impact)
-
-    2. Faculty Teaser
-      - Length: 50–100 words
-      - Concise institutional summary.
-
-    ────────────────────────────────────────
-    TARGET AUDIENCE
-    ────────────────────────────────────────
-
-    {audiences}
-
-    ────────────────────────────────────────
-    LANGUAGES
-    ────────────────────────────────────────
-
-    Generate output in the following languages:
-    {languages}
-
-    ────────────────────────────────────────
-    READING LEVEL
-    ────────────────────────────────────────
-
-    For EACH text choose:
-    - beginner
-    - intermediate
-
-    Select based on audience and technical density.
-
-    ────────────────────────────────────────
-    STYLE GUIDELINES
-    ────────────────────────────────────────
-
-    - Write for a PUBLIC-FACING university website, NOT an academic paper
-    - Use clear, simple language that non-experts can understand
-    - Avoid jargon — if technical terms are necessary, briefly explain them
-    - Short sentences and paragraphs for easy readability
-    - Active voice preferred over passive voice
-    - Preserve specific project details when available
-    - No unverifiable claims
-    - Target reading level: general public with interest in science/technology
-
-    ────────────────────────────────────────
-    OUTPUT FORMAT (STRICT JSON)
-    ────────────────────────────────────────
-
-    {{
-      "project_page": {{
-        "<language_code>": {{
-          "text": "...",
-          "reading_level": "...",
-          "word_count": ...
-        }}
-      }},
-      "faculty_teaser": {{
-        "<language_code>": {{
-          "text": "...",
-          "reading_level": "...",
-          "word_count": ...
-        }}
-      }},
-      "used_keywords": ["..."],
-      "warnings": ["..."]
-    }}
-
-    Replace <language_code> with each requested language.
-
-    Return ONLY valid JSON.
+
+def build_section_context(request: GenerateProjectTextInput, section: str, language: str) -> list[dict]:
+    """
+    Builds a prompt for a single (section, language) part of the output.
+    Used by the fan-out mode, which requests every part as its own, shorter
+    completion and merges the results.
     """
 
-    return prompt.strip()
+    if section not in _SECTION_TASKS:
+        raise ValueError(f"Unknown section: {section}")
+
+    system_prompt = _compile_section_system_prompt(
+        section,
+        tuple(a.value for a in request.target_audience),
+        language,
+    )
+
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": _source_block(request)},
+    ]
+
+
+def prompt_hash(request: GenerateProjectTextInput) -> str:
+    """Fingerprint of the full prompt for a request (stored with each generation)."""
+    payload = json.dumps(build_context(request), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def input_fingerprint(request: GenerateProjectTextInput, model: str) -> str:
+    """
+    Fingerprint of everything a generation depends on: source text, keywords,
+    audiences and languages, prompt template version and model.
+    """
+    payload = json.dumps(
+        {
+            "template_version": PROMPT_TEMPLATE_VERSION,
+            "model": model,
+            "description": request.project_description,
+            "keywords": request.keywords,
+            "target_audience": [a.value for a in request.target_audience],
+            "languages": [lang.value for lang in request.languages],
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
@@ -1,73 +1,261 @@
+import asyncio
+import functools
+import hashlib
+import json
 import logging
+import multiprocessing
+import os
 import sys
 import contextlib
-import langcheck.metrics as metrics
+from concurrent.futures import ProcessPoolExecutor
+
+from quality import guess_language
+from utils import env_flag
+
+# Number of worker processes running LangCheck metrics off the event loop
+EVAL_WORKERS = int(os.getenv("EVAL_WORKERS", "1"))
+
+# Load the metric models when a worker starts instead of on the first evaluation
+EVAL_PRELOAD_MODELS = env_flag("EVAL_PRELOAD_MODELS", False)
+
+# Bump when the metric set or its configuration changes, so stored evaluations are recomputed
+METRIC_VERSION = "langcheck-sim-fact-rougeL-v2"
+
+# The section whose score in the reference's language is reported as the headline "metrics"
+PRIMARY_SECTION = "project_page"
+# Language assumed for a reference whose language cannot be guessed
+DEFAULT_REFERENCE_LANGUAGE = "de"
+# Languages with their own LangCheck metric models (langcheck.metrics.<lang>)
+LANGCHECK_LANGUAGES = ("de", "en")
 
 # -------------------------
 # LLM TEXT EVALUATION
-# Uses LangCheck metrics 
+# Uses LangCheck metrics
 # -------------------------
 
-def evaluate_generated_vs_reference(
+def _round(value: float | None) -> float | None:
+    return round(value, 4) if value is not None else None
+
+
+def reference_language(human_reference_text: str) -> str:
+    """Language of the reference; only generated texts in this language are scored against it."""
+    return guess_language(human_reference_text) or DEFAULT_REFERENCE_LANGUAGE
+
+
+def score_pairs(generated_texts: list[str], reference_texts: list[str], *, language: str) -> list[dict]:
+    """
+    Score generated texts against their references, all in the given language,
+    with one batched LangCheck call per metric.
+
+    Metrics (LangCheck's models for the language):
+    - semantic similarity (langcheck)
+    - factual consistency (vs. human reference)
+    - ROUGE-L
+    """
+    if not generated_texts:
+        return []
+    if language not in LANGCHECK_LANGUAGES:
+        raise ValueError(f"No LangCheck metrics for language '{language}'")
+
+    # Imported on first use: langcheck pulls in torch/transformers, which takes seconds.
+    # In the server this only ever happens inside the worker processes.
+    import importlib
+    metrics = importlib.import_module(f"langcheck.metrics.{language}")
+
+    # Redirect stdout to stderr to prevent library warnings from
+    # corrupting the MCP JSON-RPC stream on stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        # Semantic similarity (langcheck)
+        semantic_similarity = metrics.semantic_similarity(
+            generated_texts,
+            reference_texts
+        ).metric_values
+
+        # Factual consistency (vs. human reference)
+        factual_consistency = metrics.factual_consistency(
+            generated_texts,
+            reference_texts
+        ).metric_values
+
+        # ROUGE-L
+        rouge_l = metrics.rougeL(
+            generated_texts,
+            reference_texts
+        ).metric_values
+
+    return [
+        {
+            "semantic_similarity": _round(sim),
+            "factual_consistency": _round(fact),
+            "rouge_l": _round(rouge),
+        }
+        for sim, fact, rouge in zip(semantic_similarity, factual_consistency, rouge_l)
+    ]
+
+
+def evaluation_input_hash(generated_texts: dict[str, dict[str, str]], human_reference_text: str) -> str:
+    """Fingerprint of everything an evaluation result depends on."""
+    payload = json.dumps(
+        {"generated": generated_texts, "reference": human_reference_text, "metric_version": METRIC_VERSION},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def text_keys(generated_texts: dict[str, dict[str, str]], language: str | None = None) -> list[tuple[str, str]]:
+    """(section, language) pairs that have a non-empty text, optionally only those in one language."""
+    return [
+        (section, lang)
+        for section, texts in generated_texts.items()
+        for lang, text in texts.items()
+        if text and text.strip() and (language is None or lang == language)
+    ]
+
+
+def build_evaluation_result(
     *,
     project_id: str,
-    generated_text: str,
+    generated_texts: dict[str, dict[str, str]],
     human_reference_text: str,
+    keys: list[tuple[str, str]],
+    scores: list[dict],
 ) -> dict:
     """
-    Compare generated text against human-written reference
-    using multiple evaluation metrics.
+    Assemble the evaluation.json document from the scores of keys (the texts
+    in the reference's language); every other text is marked "skipped".
+    """
+    language = reference_language(human_reference_text)
+    per_text: dict[str, dict[str, dict]] = {}
+    for section, lang in text_keys(generated_texts):
+        per_text.setdefault(section, {})[lang] = {
+            "status": "skipped",
+            "reason": f"Reference is in '{language}'",
+            "semantic_similarity": None,
+            "factual_consistency": None,
+            "rouge_l": None,
+        }
+    for (section, lang), score in zip(keys, scores):
+        per_text.setdefault(section, {})[lang] = {"status": "scored", **score}
 
-    Metrics:
-    - semantic similarity (langcheck)
-    - factual consistency (vs. human reference)
-    - ROUGE-L
+    headline = per_text.get(PRIMARY_SECTION, {}).get(language)
+    return {
+        "project_id": project_id,
+        "status": "complete",
+        "metrics": {k: v for k, v in headline.items() if k != "status"} if headline else None,
+        "per_text": per_text,
+        "reference_language": language,
+        "reference_excerpt": human_reference_text[:300],
+        "metric_version": METRIC_VERSION,
+        "input_hash": evaluation_input_hash(generated_texts, human_reference_text),
+    }
+
+
+def evaluate_generation_vs_reference(
+    *,
+    project_id: str,
+    generated_texts: dict[str, dict[str, str]],
+    human_reference_text: str,
+) -> dict:
+    """
+    Compare the generated texts in the reference's language (every section)
+    against the human-written reference. generated_texts maps section -> language -> text.
+
+    "metrics" holds the scores of PRIMARY_SECTION in the reference's language,
+    "per_text" holds all texts in the same layout as the input; texts in
+    other languages have "status": "skipped" and no scores.
     """
 
     if not human_reference_text or not human_reference_text.strip():
         return {
             "project_id": project_id,
+            "status": "skipped",
             "metrics": None,
             "reason": "Reference description missing — evaluation skipped.",
         }
 
-    try:
-
-        # Redirect stdout to stderr to prevent library warnings from
-        # corrupting the MCP JSON-RPC stream on stdout
-        with contextlib.redirect_stdout(sys.stderr):
-            # Semantic similarity (langcheck)
-            semantic_similarity = metrics.semantic_similarity(
-                generated_text,
-                human_reference_text
-            ).metric_values[0]
-
-            # Factual consistency (vs. human reference)
-            factual_consistency = metrics.factual_consistency(
-                generated_text,
-                human_reference_text
-            ).metric_values[0]
-
-            # ROUGE-L
-            rouge_l = metrics.rougeL(
-                generated_text,
-                human_reference_text
-            ).metric_values[0]
-
-        return {
-            "project_id": project_id,
-            "metrics": {
-                "semantic_similarity": round(semantic_similarity, 4),
-                "factual_consistency": round(factual_consistency, 4),
-                "rouge_l": round(rouge_l, 4),
-            },
-            "reference_excerpt": human_reference_text[:300],
-        }
+    language = reference_language(human_reference_text)
+    keys = text_keys(generated_texts, language)
 
+    try:
+        scores = score_pairs(
+            [generated_texts[section][lang] for section, lang in keys],
+            [human_reference_text] * len(keys),
+            language=language,
+        )
     except Exception as e:
         logging.error(f"Evaluation failed for {project_id}: {e}")
         return {
             "project_id": project_id,
+            "status": "failed",
             "metrics": None,
             "reason": f"Evaluation error: {e}",
-        }
\ No newline at end of file
+        }
+
+    return build_evaluation_result(
+        project_id=project_id,
+        generated_texts=generated_texts,
+        human_reference_text=human_reference_text,
+        keys=keys,
+        scores=scores,
+    )
+
+
+def preload_models():
+    """
+    Initialise LangCheck's metric models by scoring a tiny pair once.
+    LangCheck caches the loaded models per process, so later calls skip the load.
+    """
+    logging.info("Preloading evaluation models...")
+    # Other languages' models are loaded by their first evaluation
+    score_pairs(["Warm-up text."], ["Warm-up text."], language=DEFAULT_REFERENCE_LANGUAGE)
+    logging.info("Evaluation models loaded.")
+
+
+# -------------------------
+# WORKER POOL
+# Keeps model inference off the MCP event loop
+# -------------------------
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def _init_worker():
+    """Point the worker's stdout at stderr so native library output cannot reach the MCP stream."""
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    if EVAL_PRELOAD_MODELS:
+        try:
+            preload_models()
+        except Exception as e:
+            logging.error(f"Preloading evaluation models failed: {e}")
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=EVAL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+    return _executor
+
+
+def start_workers():
+    """Spawn the worker processes now so their model preloading overlaps server start-up."""
+    executor = get_executor()
+    for _ in range(EVAL_WORKERS):
+        executor.submit(_ping)
+
+
+async def evaluate_in_worker(**kwargs) -> dict:
+    """Run evaluate_generation_vs_reference in the worker pool and await the result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_executor(),
+        functools.partial(evaluate_generation_vs_reference, **kwargs),
+    )
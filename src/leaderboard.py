@@ -0,0 +1,193 @@
+import bisect
+import threading
+import time
+from collections import Counter
+
+from output_index import OutputIndex
+from utils import percentile
+
+METRICS = ("semantic_similarity", "factual_consistency", "rouge_l")
+SORT_KEYS = ("project_id", "status", *METRICS, "evaluated_at")
+PERCENTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+# Equal-width histogram bins on [0, 1]; values outside are counted in the first/last bin
+HISTOGRAM_BINS = 10
+
+
+#-------------------------
+# EVALUATION LEADERBOARD
+# Per-project scores and corpus aggregates, updated per changed evaluation.json
+#-------------------------
+
+class _MetricAggregate:
+    """Sorted values, running sum and histogram counts for one metric."""
+
+    def __init__(self):
+        self.values: list[float] = []
+        self.total = 0.0
+        self.bins = [0] * HISTOGRAM_BINS
+
+    @staticmethod
+    def _bin(value: float) -> int:
+        return min(HISTOGRAM_BINS - 1, max(0, int(value * HISTOGRAM_BINS)))
+
+    def add(self, value: float):
+        bisect.insort(self.values, value)
+        self.total += value
+        self.bins[self._bin(value)] += 1
+
+    def remove(self, value: float):
+        index = bisect.bisect_left(self.values, value)
+        if index < len(self.values) and self.values[index] == value:
+            del self.values[index]
+            self.total -= value
+            self.bins[self._bin(value)] -= 1
+
+    def summary(self) -> dict:
+        count = len(self.values)
+        return {
+            "count": count,
+            "mean": round(self.total / count, 4) if count else None,
+            "min": self.values[0] if count else None,
+            "max": self.values[-1] if count else None,
+            "percentiles": {f"p{int(q * 100)}": percentile(self.values, q) for q in PERCENTILES},
+            "histogram": [
+                {"start": i / HISTOGRAM_BINS, "end": (i + 1) / HISTOGRAM_BINS, "count": n}
+                for i, n in enumerate(self.bins)
+            ],
+        }
+
+
+class Leaderboard:
+    """
+    Scores of all projects with sorting, paging and corpus statistics.
+
+    refresh() stats each project's evaluation.json through the OutputIndex
+    (at most every poll_interval seconds) and only re-reads and re-aggregates
+    the ones that changed. Sorted views and statistics are cached until then.
+    """
+
+    def __init__(self, index: OutputIndex, poll_interval: float | None = None):
+        self.index = index
+        self.poll_interval = index.poll_interval if poll_interval is None else poll_interval
+        self._lock = threading.Lock()
+        self._rows: dict[str, dict] = {}
+        self._signatures: dict[str, tuple[int, int] | None] = {}
+        self._aggregates = {metric: _MetricAggregate() for metric in METRICS}
+        self._status = Counter()
+        self._refreshed_at = 0.0
+        self._started = time.time_ns()
+        self.version = 0
+        self._sorted: dict[tuple[str, bool], list[dict]] = {}
+        self._stats: dict | None = None
+
+    # --- Incremental updates ---
+
+    def _remove(self, project_id: str):
+        row = self._rows.pop(project_id, None)
+        self._signatures.pop(project_id, None)
+        if row is None:
+            return
+        self._status[row["status"]] -= 1
+        for metric in METRICS:
+            if row[metric] is not None:
+                self._aggregates[metric].remove(row[metric])
+
+    def _add(self, project_id: str, row: dict, signature: tuple[int, int] | None):
+        self._rows[project_id] = row
+        self._signatures[project_id] = signature
+        self._status[row["status"]] += 1
+        for metric in METRICS:
+            if row[metric] is not None:
+                self._aggregates[metric].add(row[metric])
+
+    @staticmethod
+    def _row(project_id: str, evaluation: dict | None, mtime: float | None) -> dict:
+        evaluation = evaluation if isinstance(evaluation, dict) else {}
+        metrics = evaluation.get("metrics") or {}
+        return {
+            "project_id": project_id,
+            "status": evaluation.get("status", "none"),
+            **{metric: metrics.get(metric) for metric in METRICS},
+            "metric_version": evaluation.get("metric_version"),
+            "evaluated_at": mtime,
+        }
+
+    def refresh(self, force: bool = False):
+        with self._lock:
+            if not force and time.monotonic() - self._refreshed_at < self.poll_interval:
+                return
+            changed = False
+            projects = self.index.projects()
+            for project_id in set(self._rows) - set(projects):
+                self._remove(project_id)
+                changed = True
+            for project_id in projects:
+                document = self.index.evaluation(project_id)
+                signature = document.signature if document else None
+                if project_id in self._rows and self._signatures.get(project_id) == signature:
+                    continue
+                self._remove(project_id)
+                self._add(
+                    project_id,
+                    self._row(project_id, document.value if document else None, document.mtime if document else None),
+                    signature,
+                )
+                changed = True
+            if changed:
+                self.version += 1
+                self._sorted.clear()
+                self._stats = None
+            self._refreshed_at = time.monotonic()
+
+    # --- Queries ---
+
+    @property
+    def etag(self) -> str:
+        return f'"{self._started:x}-{self.version:x}"'
+
+    def _sorted_rows(self, sort: str, descending: bool) -> list[dict]:
+        key = (sort, descending)
+        if key not in self._sorted:
+            present = [r for r in self._rows.values() if r[sort] is not None]
+            missing = [r for r in self._rows.values() if r[sort] is None]
+            present.sort(key=lambda r: (r[sort], r["project_id"]), reverse=descending)
+            missing.sort(key=lambda r: r["project_id"])
+            # Projects without a value are listed last in either order
+            self._sorted[key] = present + missing
+        return self._sorted[key]
+
+    def page(self, *, sort: str = "rouge_l", order: str = "asc", page: int = 1, per_page: int = 50) -> dict:
+        """One page of rows. Ascending order by default, so the worst scores come first."""
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key '{sort}' (expected one of {', '.join(SORT_KEYS)})")
+        if order not in ("asc", "desc"):
+            raise ValueError("order must be 'asc' or 'desc'")
+        self.refresh()
+        per_page = max(1, min(per_page, 500))
+        with self._lock:
+            rows = self._sorted_rows(sort, order == "desc")
+            total = len(rows)
+            pages = max(1, -(-total // per_page))
+            page = max(1, min(page, pages))
+            items = rows[(page - 1) * per_page:page * per_page]
+        return {
+            "total": total,
+            "page": page,
+            "pages": pages,
+            "per_page": per_page,
+            "sort": sort,
+            "order": order,
+            "items": items,
+        }
+
+    def stats(self) -> dict:
+        """Corpus-level aggregates over all completed evaluations."""
+        self.refresh()
+        with self._lock:
+            if self._stats is None:
+                self._stats = {
+                    "projects": len(self._rows),
+                    "status": {status: n for status, n in sorted(self._status.items()) if n},
+                    "metrics": {metric: agg.summary() for metric, agg in self._aggregates.items()},
+                }
+            return self._stats
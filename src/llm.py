@@ -1,51 +1,291 @@
 import os
-from openai import AsyncOpenAI
+import logging
+import time
+from typing import Awaitable, Callable
 from dotenv import load_dotenv
+from cache import response_cache
+from transport import transport, build_http_client, ResilientTransport
+from router import ModelRouter
+from ratelimit import rate_limiter, CHARS_PER_TOKEN
+from usage import record_usage
+from schemas import CacheMode
 
 load_dotenv()
 
 model="qwen3-30b-a3b-instruct-2507"
 #model="openai-gpt-oss-120b"
+temperature=0.4
+
+# Model pool, e.g. LLM_MODELS="qwen3-30b-a3b-instruct-2507,openai-gpt-oss-120b".
+# The first model is the primary: it is tried first and names the cache keys.
+models=[m.strip() for m in os.getenv("LLM_MODELS", model).split(",") if m.strip()]
+model=models[0]
+router=ModelRouter(models, primary_transport=transport)
+
+
+# JSON schema response_format: "auto" tries it and falls back if the backend rejects it
+STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "auto").lower()
+_structured_output_supported = STRUCTURED_OUTPUT != "off"
 
 
 api_key=os.getenv("GWDG_API_KEY")
 base_url=os.getenv("GWDG_API_BASE")
 
 
-client = AsyncOpenAI(api_key=api_key,
-            base_url=base_url)
+# Created on first use (the openai package is slow to import); may be replaced, e.g. by benchmarks
+client = None
+
+
+def get_client():
+  """The shared AsyncOpenAI client."""
+  global client
+  if client is None:
+    from openai import AsyncOpenAI
+    # Retries are handled by transport.call (backoff, Retry-After, circuit breaker)
+    client = AsyncOpenAI(api_key=api_key,
+            base_url=base_url,
+            http_client=build_http_client(),
+            max_retries=0)
+  return client
 
 
 #-------------------------
 # LLM INTERFACE
 #-------------------------
 
-async def generate_text_from_context(prompt: str) -> dict:
+async def _stream_completion(
+  messages: list[dict],
+  on_chunk: Callable[[str], Awaitable[None]] | None,
+  *,
+  model_name: str,
+  model_transport: ResilientTransport,
+  **kwargs,
+) -> dict:
   """
-  Generate text from an explicit model context.
-  Returns a dict with 'text' and 'token_usage' keys.
+  Consume a streamed completion, passing each content delta to on_chunk.
+  An exception raised by on_chunk closes the stream immediately.
   """
-  
-  if not prompt.strip():
-    raise ValueError("Prompt must not be empty.")
-  
-  response = await client.chat.completions.create(
-    messages=[
-      {"role": "system", "content": prompt},
-    ],
-    temperature=0.4,
-    model= model
+  # Only opening the stream is retried; a connection lost mid-stream raises
+  stream = await model_transport.call(lambda: get_client().chat.completions.create(
+    messages=messages,
+    temperature=temperature,
+    model=model_name,
+    stream=True,
+    stream_options={"include_usage": True},
+    **kwargs,
+  ))
+
+  parts: list[str] = []
+  usage = None
+  try:
+    async for chunk in stream:
+      if chunk.usage:
+        usage = chunk.usage
+      if not chunk.choices:
+        continue
+      delta = chunk.choices[0].delta.content
+      if delta:
+        parts.append(delta)
+        if on_chunk:
+          await on_chunk(delta)
+  finally:
+    await stream.close()
+
+  return {"text": "".join(parts), "usage": usage}
+
+
+async def _complete(
+  messages: list[dict],
+  *,
+  model_name: str,
+  model_transport: ResilientTransport,
+  stream: bool,
+  on_chunk: Callable[[str], Awaitable[None]] | None,
+  **kwargs,
+) -> tuple[str, object]:
+  """Run one completion on one model and return (text, usage)."""
+  if stream:
+    streamed = await _stream_completion(
+      messages, on_chunk, model_name=model_name, model_transport=model_transport, **kwargs)
+    return streamed["text"], streamed["usage"]
+
+  response = await model_transport.call(lambda: get_client().chat.completions.create(
+    messages=messages,
+    temperature=temperature,
+    model=model_name,
+    **kwargs,
+  ))
+  return response.choices[0].message.content, response.usage
+
+
+def _record(token_usage: dict | None, *, used_model: str, project_id: str | None, latency: float, cache_hit: bool,
+            aborted: bool = False):
+  record_usage(
+    model=used_model,
+    project_id=project_id,
+    prompt_tokens=(token_usage or {}).get("prompt_tokens", 0),
+    completion_tokens=(token_usage or {}).get("completion_tokens", 0),
+    latency_seconds=latency,
+    cache_hit=cache_hit,
+    aborted=aborted,
   )
 
+
+def _estimate_usage(messages: list[dict], completion_chars: int, used_model: str) -> dict:
+  """Token usage of an aborted call, estimated from the characters sent and received."""
+  prompt_tokens = sum(len(m.get("content") or "") for m in messages) // CHARS_PER_TOKEN
+  completion_tokens = completion_chars // CHARS_PER_TOKEN
+  return {
+    "prompt_tokens": prompt_tokens,
+    "completion_tokens": completion_tokens,
+    "total_tokens": prompt_tokens + completion_tokens,
+    "model": used_model,
+  }
+
+
+async def generate_text_from_context(
+  prompt: str | list[dict],
+  *,
+  cache_mode: CacheMode = CacheMode.use,
+  stream: bool = False,
+  on_chunk: Callable[[str], Awaitable[None]] | None = None,
+  json_schema: dict | None = None,
+  project_id: str | None = None,
+) -> dict:
+  """
+  Generate text from an explicit model context, given as chat messages
+  (or a single string, sent as the system message).
+  Returns a dict with 'text', 'token_usage', 'model', 'cache_hit' and 'cache_key' keys.
+
+  The model is chosen from the LLM_MODELS pool by the router (router.py), which
+  falls back to the next model on errors and timeouts and, with LLM_HEDGE=1,
+  hedges slow non-streamed requests. The model that answered is returned in
+  'model' and in 'token_usage'. A stream is only moved to another model if no
+  delta has been passed to on_chunk yet.
+
+  json_schema ({"name": ..., "schema": ...}) requests structured output via
+  response_format when the backend supports it; with LLM_STRUCTURED_OUTPUT=auto
+  a rejected response_format disables it for the rest of the process.
+
+  Every call, cached or not, is appended to the usage ledger (usage.py).
+  A call that raises after text was received (e.g. a stream aborted by
+  on_chunk) is recorded with estimated usage and aborted=true; the estimate
+  is also attached to the exception as its token_usage attribute.
+  Every attempt that reaches the endpoint, including fallbacks and hedges, is
+  admitted by the adaptive rate limiter (ratelimit.py) first; cache hits are not.
+
+  With stream=True the completion is consumed as token deltas and each delta is
+  passed to on_chunk (a cached response is passed as a single chunk). on_chunk
+  may raise to abort the generation early; if it rejects a cached response,
+  the exception carries the entry's key as its cache_key attribute.
+
+  cache_mode controls the on-disk response cache (keyed by the primary model;
+  an entry written by a fallback keeps that model in its 'model' field):
+  - use: return a cached response for an identical request, else call the LLM and store it
+  - refresh: always call the LLM and overwrite the cached response
+  - bypass: neither read nor write the cache
+  """
+
+  messages = [{"role": "system", "content": prompt}] if isinstance(prompt, str) else prompt
+  if not any(m.get("content", "").strip() for m in messages):
+    raise ValueError("Prompt must not be empty.")
+
+  cache_key = response_cache.make_key(model, temperature, messages)
+  if cache_mode == CacheMode.use:
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+      logging.info(f"LLM cache hit ({cache_key[:12]}).")
+      if stream and on_chunk:
+        try:
+          await on_chunk(cached["text"])
+        except Exception as e:
+          # Lets the caller discard a cached response it rejected
+          e.cache_key = cache_key
+          raise
+      # Responses cached before the model pool existed came from the primary model
+      cached = {"model": model, **cached}
+      if cached.get("token_usage"):
+        cached["token_usage"] = {"model": cached["model"], **cached["token_usage"]}
+      _record(cached.get("token_usage"), used_model=cached["model"], project_id=project_id, latency=0.0, cache_hit=True)
+      return {**cached, "cache_hit": True, "cache_key": cache_key}
+
+  global _structured_output_supported
+  kwargs = {}
+  if json_schema and _structured_output_supported:
+    kwargs["response_format"] = {"type": "json_schema", "json_schema": {**json_schema, "strict": True}}
+
+  from openai import BadRequestError
+
+  kind = json_schema["name"] if json_schema else "text"
+  emitted = False
+  emitted_chars = 0
+  current_model = model
+
+  async def forward(delta: str):
+    nonlocal emitted, emitted_chars
+    emitted = True
+    emitted_chars += len(delta)
+    if on_chunk:
+      await on_chunk(delta)
+
+  def should_fallback(error: Exception) -> bool:
+    # A rejected response_format is handled below; a started stream cannot switch models
+    return not emitted and not isinstance(error, BadRequestError)
+
+  async def complete(model_name: str, model_transport: ResilientTransport, **kwargs):
+    nonlocal current_model
+    current_model = model_name
+    # Every attempt (first try, fallback or hedge) waits for its own slot of the shared RPM/TPM limiter
+    async with rate_limiter.slot(messages, kind) as slot:
+      text, usage = await _complete(
+        messages, model_name=model_name, model_transport=model_transport,
+        stream=stream, on_chunk=forward, **kwargs)
+      slot.finish(usage)
+    return text, usage
+
+  async def route(**kwargs):
+    return await router.run(
+      lambda model_name, model_transport: complete(model_name, model_transport, **kwargs),
+      hedge=not stream,
+      should_fallback=should_fallback,
+    )
+
+  started = time.perf_counter()
+  try:
+    try:
+      (text, usage), used_model = await route(**kwargs)
+    except BadRequestError as e:
+      if "response_format" not in kwargs or STRUCTURED_OUTPUT == "on":
+        raise
+      logging.warning(f"Endpoint rejected JSON schema response_format ({e}); falling back to prompt-only JSON.")
+      _structured_output_supported = False
+      (text, usage), used_model = await route()
+  except BaseException as e:
+    # Tokens were spent once text arrived: keep them in the ledger although the call failed
+    if emitted:
+      token_usage = _estimate_usage(messages, emitted_chars, current_model)
+      _record(token_usage, used_model=current_model, project_id=project_id,
+              latency=time.perf_counter() - started, cache_hit=False, aborted=True)
+      e.token_usage = token_usage
+    raise
+
   token_usage = None
-  if response.usage:
+  if usage:
     token_usage = {
-      "prompt_tokens": response.usage.prompt_tokens,
-      "completion_tokens": response.usage.completion_tokens,
-      "total_tokens": response.usage.total_tokens,
+      "prompt_tokens": usage.prompt_tokens,
+      "completion_tokens": usage.completion_tokens,
+      "total_tokens": usage.total_tokens,
+      "model": used_model,
     }
 
-  return {
-    "text": response.choices[0].message.content,
+  result = {
+    "text": text,
     "token_usage": token_usage,
+    "model": used_model,
   }
+  _record(token_usage, used_model=used_model, project_id=project_id, latency=time.perf_counter() - started, cache_hit=False)
+
+  if cache_mode != CacheMode.bypass and result["text"]:
+    response_cache.put(cache_key, result)
+
+  return {**result, "cache_hit": False, "cache_key": cache_key}
@@ -0,0 +1,148 @@
+import email.utils
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from storage import StorageBackend, DocumentStat
+
+# How often the project listing is re-scanned for new or removed outputs
+POLL_INTERVAL_SECONDS = float(os.getenv("DASHBOARD_POLL_SECONDS", "2"))
+
+
+#-------------------------
+# OUTPUT INDEX
+# In-memory view of the outputs directory for the dashboard
+#-------------------------
+
+@dataclass(frozen=True)
+class Document:
+    """A parsed file together with the validators used for HTTP caching."""
+    value: Any
+    raw: bytes
+    mtime: float
+    signature: tuple[int, int]
+
+    @property
+    def etag(self) -> str:
+        mtime_ns, size = self.signature
+        return f'"{mtime_ns:x}-{size:x}"'
+
+    @property
+    def last_modified(self) -> str:
+        return email.utils.formatdate(self.mtime, usegmt=True)
+
+
+def _parse_json(raw: bytes) -> Any:
+    return json.loads(raw.decode("utf-8"))
+
+
+def _parse_text(raw: bytes) -> str:
+    return raw.decode("utf-8").strip()
+
+
+class OutputIndex:
+    """
+    Serves stored outputs, evaluations and reference texts from memory.
+
+    A document is re-read only when its stat signature in the storage backend
+    changes, so a request costs one stat (file stat or indexed lookup) instead
+    of a read and parse. The project listing is rebuilt when the backend's
+    listing token changes, and for the JSON directory backend additionally at
+    most every poll_interval seconds.
+    """
+
+    def __init__(self, store: StorageBackend, references_dir: Path, poll_interval: float = POLL_INTERVAL_SECONDS):
+        self.store = store
+        self.references_dir = references_dir
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._documents: dict[tuple[str, str], Document] = {}
+        self._projects: list[str] = []
+        self._listing_signature = None
+        self._listed_at = 0.0
+        # Distinguishes listing versions across restarts of the dashboard
+        self._started = time.time_ns()
+        self._listing_version = 0
+
+    # --- Documents ---
+
+    def _document(
+        self,
+        key: tuple[str, str],
+        stat: DocumentStat | None,
+        read: Callable[[], bytes | None],
+        parse: Callable[[bytes], Any],
+    ) -> Document | None:
+        if stat is None:
+            self._documents.pop(key, None)
+            return None
+        cached = self._documents.get(key)
+        if cached is not None and cached.signature == stat.signature:
+            return cached
+
+        try:
+            raw = read()
+            if raw is None:
+                return None
+            document = Document(value=parse(raw), raw=raw, mtime=stat.mtime, signature=stat.signature)
+        except (OSError, ValueError) as e:
+            # Keep serving the last good version
+            logging.warning(f"Could not read {key[0]} of {key[1]}: {e}")
+            return cached
+        with self._lock:
+            self._documents[key] = document
+        return document
+
+    def _stored(self, project_id: str, kind: str) -> Document | None:
+        return self._document(
+            (kind, project_id),
+            self.store.stat(project_id, kind),
+            lambda: self.store.read(project_id, kind),
+            _parse_json,
+        )
+
+    def output(self, project_id: str) -> Document | None:
+        return self._stored(project_id, "output")
+
+    def evaluation(self, project_id: str) -> Document | None:
+        return self._stored(project_id, "evaluation")
+
+    def reference(self, project_id: str) -> Document | None:
+        path = self.references_dir / f"{project_id}.txt"
+        try:
+            st = os.stat(path)
+            stat = DocumentStat(signature=(st.st_mtime_ns, st.st_size), mtime=st.st_mtime)
+        except FileNotFoundError:
+            stat = None
+        return self._document(("reference", project_id), stat, path.read_bytes, _parse_text)
+
+    # --- Project listing ---
+
+    def _listing_changed(self) -> bool:
+        signature = self.store.listing_token()
+        if signature != self._listing_signature:
+            self._listing_signature = signature
+            return True
+        return self.store.needs_polling and time.monotonic() - self._listed_at >= self.poll_interval
+
+    def projects(self) -> list[str]:
+        """Sorted IDs of all projects that have an output.json."""
+        with self._lock:
+            if self._listing_changed():
+                projects = self.store.list_projects()
+                if projects != self._projects:
+                    self._projects = projects
+                    self._listing_version += 1
+                self._listed_at = time.monotonic()
+            return self._projects
+
+    @property
+    def listing_etag(self) -> str:
+        """Validator for pages that render the project list."""
+        self.projects()
+        return f'"{self._started:x}-{self._listing_version:x}"'
@@ -0,0 +1,141 @@
+import os
+import re
+
+# Targets of the section tasks in context.py: (min, max) words and paragraphs (None: not checked)
+SECTION_TARGETS = {
+    "project_page": {"words": (300, 400), "paragraphs": (4, 4)},
+    "faculty_teaser": {"words": (50, 100), "paragraphs": None},
+}
+
+# Share of keywords that must appear in every text
+QUALITY_MIN_KEYWORD_COVERAGE = float(os.getenv("QUALITY_MIN_KEYWORD_COVERAGE", "0.5"))
+# Share of the description's content words that must reappear in texts written in its language
+QUALITY_MIN_DESCRIPTION_OVERLAP = float(os.getenv("QUALITY_MIN_DESCRIPTION_OVERLAP", "0.2"))
+
+# Words are compared on their first characters, so inflected forms still match
+STEM_CHARS = 6
+MIN_WORD_CHARS = 4
+
+_WORD = re.compile(r"\w+")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+# Function words: never counted as content words, and used to guess the description's language
+_STOPWORDS = {
+    "de": {"und", "der", "die", "das", "mit", "für", "von", "den", "dem", "ist", "sind", "eine", "einer",
+           "einem", "eines", "werden", "wird", "auch", "sowie", "durch", "oder", "nicht", "über", "dies", "diese"},
+    "en": {"the", "and", "of", "for", "with", "from", "that", "this", "these", "will", "have", "been",
+           "which", "their", "into", "also", "such", "are", "is", "to", "in", "on", "by"},
+}
+
+
+#-------------------------
+# INLINE QUALITY METRICS
+# Cheap checks on every generated text, before any model-based evaluation
+#-------------------------
+
+def _stems(text: str) -> set[str]:
+    return {
+        word[:STEM_CHARS]
+        for word in _WORD.findall(text.lower())
+        if len(word) >= MIN_WORD_CHARS and not word.isdigit()
+        and word not in _STOPWORDS["de"] and word not in _STOPWORDS["en"]
+    }
+
+
+def guess_language(text: str) -> str | None:
+    """'de' or 'en' by stopword frequency, or None if the text gives no hint."""
+    words = _WORD.findall(text.lower())
+    hits = {lang: sum(word in stopwords for word in words) for lang, stopwords in _STOPWORDS.items()}
+    best = max(hits, key=hits.get)
+    return best if hits[best] else None
+
+
+def compute_quality_metrics(
+    texts: dict[str, dict[str, str]],
+    *,
+    keywords: list[str],
+    description: str,
+) -> tuple[dict[str, dict[str, dict]], list[str]]:
+    """
+    Measure every section/language text in one pass: word and paragraph counts
+    against the prompt's targets, keyword coverage and lexical overlap with the
+    project description. Returns (section -> language -> metrics, warnings).
+    """
+    # Imported here: numpy is not needed until the first generation finishes
+    import numpy as np
+
+    cells = [(section, lang, text or "") for section, by_lang in texts.items() for lang, text in by_lang.items()]
+    if not cells:
+        return {}, []
+
+    # Shared vocabulary of description and keyword stems; each text becomes one row of a presence matrix
+    description_stems = _stems(description)
+    keyword_stems = [(keyword, stems) for keyword in keywords if (stems := _stems(keyword))]
+    vocabulary = {stem: i for i, stem in enumerate(description_stems.union(*(s for _, s in keyword_stems)))}
+
+    present = np.zeros((len(cells), len(vocabulary)), dtype=bool)
+    for row, (_, _, text) in enumerate(cells):
+        present[row, [vocabulary[s] for s in _stems(text) if s in vocabulary]] = True
+
+    word_counts = np.array([len(text.split()) for _, _, text in cells])
+    paragraph_counts = np.array([
+        sum(1 for p in _PARAGRAPH_BREAK.split(text.strip()) if p.strip()) for _, _, text in cells
+    ])
+
+    # A keyword is covered if all of its stems occur in the text
+    if keyword_stems:
+        keyword_matrix = np.zeros((len(keyword_stems), len(vocabulary)), dtype=np.int32)
+        for k, (_, stems) in enumerate(keyword_stems):
+            keyword_matrix[k, [vocabulary[s] for s in stems]] = 1
+        covered = (present.astype(np.int32) @ keyword_matrix.T) == keyword_matrix.sum(axis=1)
+        coverage = covered.mean(axis=1)
+    else:
+        covered = np.zeros((len(cells), 0), dtype=bool)
+        coverage = None
+
+    description_mask = np.zeros(len(vocabulary), dtype=bool)
+    description_mask[[vocabulary[s] for s in description_stems]] = True
+    overlap = (present & description_mask).sum(axis=1) / description_mask.sum() if description_stems else None
+
+    targets = [SECTION_TARGETS.get(section, {}) for section, _, _ in cells]
+    word_min, word_max = np.array([t.get("words") or (0, np.inf) for t in targets]).T
+    paragraph_min, paragraph_max = np.array([t.get("paragraphs") or (0, np.inf) for t in targets]).T
+    words_ok = (word_counts >= word_min) & (word_counts <= word_max)
+    paragraphs_ok = (paragraph_counts >= paragraph_min) & (paragraph_counts <= paragraph_max)
+    keywords_ok = coverage >= QUALITY_MIN_KEYWORD_COVERAGE if coverage is not None else np.ones(len(cells), dtype=bool)
+    # Translations share few words with the description, so only its own language is checked
+    description_lang = guess_language(description)
+    overlap_checked = np.array([lang == description_lang for _, lang, _ in cells]) & (overlap is not None)
+    overlap_ok = ~overlap_checked | (overlap >= QUALITY_MIN_DESCRIPTION_OVERLAP if overlap is not None else True)
+
+    metrics: dict[str, dict[str, dict]] = {}
+    warnings: list[str] = []
+    for i, (section, lang, _) in enumerate(cells):
+        label = f"{section}.{lang}"
+        missing = [keyword for k, (keyword, _) in enumerate(keyword_stems) if not covered[i, k]]
+        if not words_ok[i]:
+            low, high = SECTION_TARGETS[section]["words"]
+            warnings.append(f"{label}: {word_counts[i]} words (target {low}–{high})")
+        if not paragraphs_ok[i]:
+            low, high = SECTION_TARGETS[section]["paragraphs"]
+            target = low if low == high else f"{low}–{high}"
+            warnings.append(f"{label}: {paragraph_counts[i]} paragraphs (target {target})")
+        if not keywords_ok[i]:
+            warnings.append(
+                f"{label}: mentions {len(keyword_stems) - len(missing)}/{len(keyword_stems)} keywords "
+                f"(missing: {', '.join(missing)})"
+            )
+        if not overlap_ok[i]:
+            warnings.append(
+                f"{label}: low word overlap with the project description "
+                f"({overlap[i]:.2f} < {QUALITY_MIN_DESCRIPTION_OVERLAP:.2f})"
+            )
+        metrics.setdefault(section, {})[lang] = {
+            "word_count": int(word_counts[i]),
+            "paragraph_count": int(paragraph_counts[i]),
+            "keyword_coverage": round(float(coverage[i]), 3) if coverage is not None else None,
+            "missing_keywords": missing,
+            "description_overlap": round(float(overlap[i]), 3) if overlap is not None else None,
+            "passed": bool(words_ok[i] and paragraphs_ok[i] and keywords_ok[i] and overlap_ok[i]),
+        }
+    return metrics, warnings
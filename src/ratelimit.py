@@ -0,0 +1,273 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+
+from utils import env_flag
+
+# Provider quota; 0 disables the respective bucket
+LLM_RPM_LIMIT = float(os.getenv("LLM_RPM_LIMIT", "0"))
+LLM_TPM_LIMIT = float(os.getenv("LLM_TPM_LIMIT", "0"))
+
+# Adaptive concurrency (AIMD): +1 per `limit` successes, halved on 429 or a latency spike
+LLM_ADAPTIVE_CONCURRENCY = env_flag("LLM_ADAPTIVE_CONCURRENCY", True)
+LLM_CONCURRENCY_START = float(os.getenv("LLM_CONCURRENCY_START", "4"))
+LLM_CONCURRENCY_MIN = float(os.getenv("LLM_CONCURRENCY_MIN", "1"))
+LLM_CONCURRENCY_MAX = float(os.getenv("LLM_CONCURRENCY_MAX", os.getenv("LLM_MAX_CONNECTIONS", "20")))
+LLM_BACKOFF_FACTOR = float(os.getenv("LLM_BACKOFF_FACTOR", "0.5"))
+# A call slower per completion token than this multiple of the baseline counts as a spike
+LLM_LATENCY_SPIKE_FACTOR = float(os.getenv("LLM_LATENCY_SPIKE_FACTOR", "2.0"))
+
+# Token cost estimate: prompt characters / CHARS_PER_TOKEN + expected completion tokens
+CHARS_PER_TOKEN = 4
+LLM_EXPECTED_COMPLETION_TOKENS = int(os.getenv("LLM_EXPECTED_COMPLETION_TOKENS", "1200"))
+
+COMPLETION_EWMA_ALPHA = 0.2
+BASELINE_EWMA_ALPHA = 0.05
+# Calls measured before latency spikes are detected
+BASELINE_MIN_SAMPLES = 10
+
+
+#-------------------------
+# ADAPTIVE RATE LIMITER
+# RPM/TPM token buckets plus an AIMD concurrency limit
+#-------------------------
+
+class TokenBucket:
+    """Refills `per_minute` units per minute up to a burst of one minute's quota."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.tokens = per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if they are now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        # May go negative when a call turns out more expensive than estimated
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+    def drain(self):
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+    def stats(self) -> dict:
+        self._refill()
+        return {"per_minute": self.capacity, "available": round(self.tokens, 1)}
+
+
+class _Slot:
+    """One admitted request; call finish(usage) once the completion is known."""
+
+    def __init__(self, kind: str, estimated_tokens: int):
+        self.kind = kind
+        self.estimated_tokens = estimated_tokens
+        self.usage = None
+
+    def finish(self, usage):
+        self.usage = usage
+
+
+class AdaptiveRateLimiter:
+    """
+    Admits LLM requests so that the provider's requests-per-minute and
+    tokens-per-minute quotas are respected and the number of concurrent
+    requests follows AIMD: it grows additively while calls succeed and is cut
+    multiplicatively on a 429 or when latency per completion token spikes.
+
+    Each request's token cost is estimated up front from the prompt length
+    plus the running average completion length of its kind and corrected
+    once the actual usage is known. Waiting requests are admitted in FIFO order.
+    """
+
+    def __init__(self):
+        self.requests_bucket = TokenBucket(LLM_RPM_LIMIT) if LLM_RPM_LIMIT > 0 else None
+        self.tokens_bucket = TokenBucket(LLM_TPM_LIMIT) if LLM_TPM_LIMIT > 0 else None
+        self.limit = min(LLM_CONCURRENCY_START, LLM_CONCURRENCY_MAX) if LLM_ADAPTIVE_CONCURRENCY else LLM_CONCURRENCY_MAX
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Event] = deque()
+        self._expected_completion: dict[str, float] = {}
+        self._baseline: float | None = None
+        self._baseline_samples = 0
+        self._last_decrease = 0.0
+        self.admitted = 0
+        self.throttled = 0
+        self.latency_spikes = 0
+        self.increases = 0
+        self.decreases = 0
+        self.wait_seconds = 0.0
+
+    # --- cost estimate ---
+
+    def estimate(self, messages: list[dict], kind: str) -> int:
+        """Total tokens expected for a request of this kind."""
+        prompt = sum(len(m.get("content") or "") for m in messages) // CHARS_PER_TOKEN
+        return prompt + round(self._expected_completion.get(kind, LLM_EXPECTED_COMPLETION_TOKENS))
+
+    # --- admission ---
+
+    def _try_admit(self, cost: int) -> float:
+        """Admit now (0.0), or return the seconds to wait (inf: until a slot is released)."""
+        if self.in_flight >= max(1, math.floor(self.limit)):
+            return math.inf
+        wait = 0.0
+        if self.requests_bucket:
+            wait = max(wait, self.requests_bucket.wait_time(1))
+        if self.tokens_bucket:
+            wait = max(wait, self.tokens_bucket.wait_time(cost))
+        if wait > 0:
+            return wait
+        if self.requests_bucket:
+            self.requests_bucket.take(1)
+        if self.tokens_bucket:
+            self.tokens_bucket.take(cost)
+        self.in_flight += 1
+        self.admitted += 1
+        return 0.0
+
+    def _wake_next(self):
+        if self._waiters:
+            self._waiters[0].set()
+
+    async def _acquire(self, cost: int):
+        if not self._waiters and self._try_admit(cost) == 0.0:
+            return
+        started = time.monotonic()
+        event = asyncio.Event()
+        self._waiters.append(event)
+        try:
+            while True:
+                wait = self._try_admit(cost) if self._waiters[0] is event else math.inf
+                if wait == 0.0:
+                    return
+                event.clear()
+                try:
+                    await asyncio.wait_for(event.wait(), None if wait == math.inf else wait)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._waiters.remove(event)
+            self.wait_seconds += time.monotonic() - started
+            self._wake_next()
+
+    def _release(self):
+        self.in_flight -= 1
+        self._wake_next()
+
+    # --- feedback ---
+
+    def _increase(self):
+        if LLM_ADAPTIVE_CONCURRENCY and self.limit < LLM_CONCURRENCY_MAX:
+            self.limit = min(LLM_CONCURRENCY_MAX, self.limit + 1 / self.limit)
+            self.increases += 1
+            self._wake_next()
+
+    def _decrease(self, reason: str):
+        if not LLM_ADAPTIVE_CONCURRENCY:
+            return
+        # Cut at most once per second, so a burst of 429s counts once
+        now = time.monotonic()
+        if now - self._last_decrease < 1.0:
+            return
+        self._last_decrease = now
+        self.limit = max(LLM_CONCURRENCY_MIN, self.limit * LLM_BACKOFF_FACTOR)
+        self.decreases += 1
+        logging.warning(f"LLM concurrency limit reduced to {self.limit:.1f} ({reason}).")
+
+    def record_throttled(self):
+        """Called for every 429 response, including ones that are retried."""
+        self.throttled += 1
+        if self.requests_bucket:
+            # Nobody starts a new request until the bucket has refilled a little
+            self.requests_bucket.drain()
+        self._decrease("rate limited")
+
+    def _record_success(self, slot: _Slot, latency: float):
+        usage = slot.usage
+        completion = getattr(usage, "completion_tokens", None) if usage else None
+        total = getattr(usage, "total_tokens", None) if usage else None
+        if self.tokens_bucket and total is not None:
+            # Correct the up-front estimate with the actual usage
+            self.tokens_bucket.take(total - slot.estimated_tokens)
+        if not completion:
+            self._increase()
+            return
+
+        previous = self._expected_completion.get(slot.kind)
+        self._expected_completion[slot.kind] = (
+            completion if previous is None
+            else COMPLETION_EWMA_ALPHA * completion + (1 - COMPLETION_EWMA_ALPHA) * previous
+        )
+
+        per_token = latency / completion
+        spike = (
+            self._baseline is not None
+            and self._baseline_samples >= BASELINE_MIN_SAMPLES
+            and per_token > LLM_LATENCY_SPIKE_FACTOR * self._baseline
+        )
+        self._baseline = per_token if self._baseline is None else (
+            BASELINE_EWMA_ALPHA * per_token + (1 - BASELINE_EWMA_ALPHA) * self._baseline
+        )
+        self._baseline_samples += 1
+        if spike:
+            self.latency_spikes += 1
+            self._decrease(f"latency spike: {per_token * 1000:.0f} ms per token")
+        else:
+            self._increase()
+
+    def slot(self, messages: list[dict], kind: str) -> "_SlotContext":
+        """Async context manager admitting one request of the given kind."""
+        return _SlotContext(self, messages, kind)
+
+    def stats(self) -> dict:
+        return {
+            "adaptive": LLM_ADAPTIVE_CONCURRENCY,
+            "concurrency_limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "throttled": self.throttled,
+            "latency_spikes": self.latency_spikes,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "requests_per_minute": self.requests_bucket.stats() if self.requests_bucket else None,
+            "tokens_per_minute": self.tokens_bucket.stats() if self.tokens_bucket else None,
+            "baseline_ms_per_token": round(self._baseline * 1000, 2) if self._baseline is not None else None,
+            "expected_completion_tokens": {k: round(v) for k, v in self._expected_completion.items()},
+        }
+
+
+class _SlotContext:
+    def __init__(self, limiter: AdaptiveRateLimiter, messages: list[dict], kind: str):
+        self.limiter = limiter
+        self.slot = _Slot(kind, limiter.estimate(messages, kind))
+
+    async def __aenter__(self) -> _Slot:
+        await self.limiter._acquire(self.slot.estimated_tokens)
+        self._started = time.perf_counter()
+        return self.slot
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.limiter._record_success(self.slot, time.perf_counter() - self._started)
+        finally:
+            self.limiter._release()
+        return False
+
+
+rate_limiter = AdaptiveRateLimiter()
@@ -0,0 +1,136 @@
+import argparse
+import csv
+import logging
+import time
+import uuid
+
+from evaluation import (score_pairs, build_evaluation_result, evaluation_input_hash, text_keys,
+                        reference_language, PRIMARY_SECTION, METRIC_VERSION)
+from storage import (BASE_DIR, list_generated_projects, load_output, load_evaluation, save_evaluation,
+                     load_reference_text, generated_texts_from_output, project_write_lock)
+
+logging.basicConfig(level=logging.INFO)
+
+SUMMARY_FILE = "evaluation_summary.csv"
+
+
+#-------------------------
+# OFFLINE BULK RE-EVALUATION
+# Re-scores stored outputs without calling the LLM
+#-------------------------
+
+def _collect_jobs(project_ids: list[str], force: bool) -> tuple[list[dict], list[dict]]:
+    """
+    Pair each output with its reference and decide what needs scoring.
+    Returns (jobs to evaluate, summary rows for projects that are skipped).
+    """
+    jobs, skipped = [], []
+    for project_id in project_ids:
+        output = load_output(project_id)
+        if output is None:
+            skipped.append({"project_id": project_id, "status": "no_output"})
+            continue
+        reference = load_reference_text(project_id)
+        if not reference:
+            skipped.append({"project_id": project_id, "status": "no_reference"})
+            continue
+
+        generated_texts = generated_texts_from_output(output)
+        input_hash = evaluation_input_hash(generated_texts, reference)
+        current = load_evaluation(project_id) or {}
+        if not force and current.get("input_hash") == input_hash and current.get("status") == "complete":
+            skipped.append({"project_id": project_id, "status": "unchanged", **(current.get("metrics") or {})})
+            continue
+
+        language = reference_language(reference)
+        jobs.append({
+            "project_id": project_id,
+            "generated_texts": generated_texts,
+            "reference": reference,
+            "language": language,
+            "keys": text_keys(generated_texts, language),
+        })
+    return jobs, skipped
+
+
+def _score_jobs(jobs: list[dict], chunk_size: int) -> list[dict]:
+    """Score all (text, reference) pairs of all jobs in chunks of chunk_size, one language at a time."""
+    pairs_by_language: dict[str, list[tuple[int, str, str]]] = {}
+    for job_index, job in enumerate(jobs):
+        for section, lang in job["keys"]:
+            pairs_by_language.setdefault(job["language"], []).append(
+                (job_index, job["generated_texts"][section][lang], job["reference"])
+            )
+    scores_per_job: list[list[dict]] = [[] for _ in jobs]
+
+    for language, pairs in sorted(pairs_by_language.items()):
+        for start in range(0, len(pairs), chunk_size):
+            chunk = pairs[start:start + chunk_size]
+            logging.info(f"Scoring {language} pairs {start + 1}–{start + len(chunk)} of {len(pairs)}...")
+            scores = score_pairs([text for _, text, _ in chunk], [ref for _, _, ref in chunk], language=language)
+            for (job_index, _, _), score in zip(chunk, scores):
+                scores_per_job[job_index].append(score)
+
+    rows = []
+    for job, scores in zip(jobs, scores_per_job):
+        evaluation = build_evaluation_result(
+            project_id=job["project_id"],
+            generated_texts=job["generated_texts"],
+            human_reference_text=job["reference"],
+            keys=job["keys"],
+            scores=scores,
+        )
+        # The server may have stored a new output (and its pending evaluation) while scoring
+        with project_write_lock(job["project_id"]):
+            output = load_output(job["project_id"])
+            if output is None or generated_texts_from_output(output) != job["generated_texts"]:
+                logging.info(f"Output of {job['project_id']} changed while scoring; evaluation discarded.")
+                rows.append({"project_id": job["project_id"], "status": "changed"})
+                continue
+            save_evaluation(job["project_id"], {**evaluation, "evaluation_id": uuid.uuid4().hex})
+        rows.append({"project_id": job["project_id"], "status": "evaluated", **(evaluation["metrics"] or {})})
+    return rows
+
+
+def _write_summary(rows: list[dict]):
+    columns = ["project_id", "status", "semantic_similarity", "factual_consistency", "rouge_l"]
+    path = BASE_DIR / SUMMARY_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print(f"\n{'project':<20} {'status':<13} {'sim':>6} {'fact':>6} {'rougeL':>7}")
+    for row in rows:
+        values = [row.get(c) for c in columns[2:]]
+        cells = [f"{v:.3f}" if isinstance(v, float) else "–" for v in values]
+        print(f"{row['project_id']:<20} {row['status']:<13} {cells[0]:>6} {cells[1]:>6} {cells[2]:>7}")
+    print(f"\nSummary written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-evaluate stored outputs against their references without calling the LLM."
+    )
+    parser.add_argument("projects", nargs="*", help="Project IDs to re-evaluate (default: all under OUTPUT_DIR).")
+    parser.add_argument("--force", action="store_true", help="Re-score even if output, reference and metric version are unchanged.")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Number of text pairs per batched metric call.")
+    args = parser.parse_args()
+
+    project_ids = args.projects or list_generated_projects()
+    logging.info(f"Re-evaluating {len(project_ids)} projects (metric version {METRIC_VERSION}, "
+                 f"headline text {PRIMARY_SECTION} in the reference's language)")
+
+    started = time.perf_counter()
+    jobs, skipped = _collect_jobs(project_ids, args.force)
+    logging.info(f"{len(jobs)} to score, {len(skipped)} skipped.")
+    rows = _score_jobs(jobs, max(1, args.chunk_size)) + skipped
+    rows.sort(key=lambda r: r["project_id"])
+
+    _write_summary(rows)
+    logging.info(f"Done in {time.perf_counter() - started:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
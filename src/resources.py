@@ -1,9 +1,26 @@
 from mcp_app import mcp
-import pandas as pd
+from snapshot import load_snapshot
+from cache import response_cache
+from transport import transport
+from llm import router
+from ratelimit import rate_limiter
+from coalescing import generation_flights
+from utils import _KEYWORD_COLS
+from pathlib import Path
+from typing import TYPE_CHECKING
+import logging
 import os
 import stat
+import threading
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 EXCEL_PATH = os.getenv("EXCEL_PATH", "src/data/2026-01-30_Projektbericht_öffentliche_Projekte.xlsx")
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH")
+
+# Only these columns are used by the generation pipeline
+PROJECT_COLUMNS = ("Abkürzung", "Beschreibung", *_KEYWORD_COLS)
 
 
 #-------------------------
@@ -19,18 +36,36 @@ def _ensure_read_only(path: str):
         os.chmod(path, read_only)
 
 
-@mcp.resource("mcp://projects", mime_type="application/json")
-def projects_resource():
-    """
-    Read-only project metadata loaded from Excel.
-    """
+def snapshot_path_for(excel_path: str) -> Path:
+    """Location of the columnar snapshot belonging to an Excel workbook."""
+    return Path(SNAPSHOT_PATH) if SNAPSHOT_PATH else Path(excel_path).with_suffix(".arrow")
+
+
+def read_project_frame(path: str) -> "pd.DataFrame":
+    """Read only the pipeline's columns from the Excel workbook."""
+    # Imported here: pandas takes long to import and is only needed once the catalog is loaded
+    import pandas as pd
     try:
-        _ensure_read_only(EXCEL_PATH)
-        df = pd.read_excel(EXCEL_PATH)
+        _ensure_read_only(path)
+        df = pd.read_excel(path, usecols=lambda c: str(c).strip() in PROJECT_COLUMNS)
     except FileNotFoundError:
-        raise RuntimeError(f"Excel file not found: {EXCEL_PATH}")
+        raise RuntimeError(f"Excel file not found: {path}")
 
     df.columns = [c.strip() for c in df.columns]
+    return df
+
+
+def _read_project_records(path: str) -> list[dict]:
+    """Load project records from the snapshot if it is fresh, else from Excel."""
+    df = load_snapshot(
+        source_path=path,
+        snapshot_path=snapshot_path_for(path),
+        columns=PROJECT_COLUMNS,
+    )
+    if df is None:
+        df = read_project_frame(path)
+    else:
+        logging.info(f"Loaded {len(df)} projects from snapshot {snapshot_path_for(path)}")
 
     # Use 'Abkürzung' (abbreviation) as the unique project identifier
     if "Abkürzung" not in df.columns:
@@ -40,3 +75,78 @@ def projects_resource():
 
     return df.to_dict(orient="records")
 
+
+class ProjectCatalog:
+    """
+    In-process cache of the project workbook.
+    The parsed records are reused until the file's mtime or size changes,
+    and a case-insensitive index on project_id gives O(1) lookups.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature: tuple[int, int] | None = None
+        self._records: list[dict] = []
+        self._index: dict[str, dict] = {}
+
+    def _current_signature(self) -> tuple[int, int]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            raise RuntimeError(f"Excel file not found: {self.path}")
+        return (st.st_mtime_ns, st.st_size)
+
+    def _refresh(self):
+        signature = self._current_signature()
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            records = _read_project_records(self.path)
+            index: dict[str, dict] = {}
+            for record in records:
+                # Keep the first occurrence, matching the previous linear scan
+                index.setdefault(record["project_id"].casefold(), record)
+            self._records, self._index = records, index
+            self._signature = signature
+
+    def records(self) -> list[dict]:
+        self._refresh()
+        return list(self._records)
+
+    def get(self, project_id: str) -> dict | None:
+        self._refresh()
+        return self._index.get(project_id.strip().casefold())
+
+
+catalog = ProjectCatalog(EXCEL_PATH)
+
+
+def get_project(project_id: str) -> dict | None:
+    """Look up a single project by its Abkürzung (case-insensitive)."""
+    return catalog.get(project_id)
+
+
+@mcp.resource("mcp://projects", mime_type="application/json")
+def projects_resource():
+    """
+    Read-only project metadata loaded from Excel.
+    """
+    return catalog.records()
+
+
+@mcp.resource("mcp://llm/stats", mime_type="application/json")
+def llm_stats_resource():
+    """
+    Runtime counters of the LLM layer (response cache, retries, circuit breaker, pool usage,
+    model routing, rate limiter, coalesced duplicate generations).
+    """
+    return {
+        "cache": response_cache.stats(),
+        "transport": transport.stats(),
+        "router": router.stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "coalescing": generation_flights.stats(),
+    }
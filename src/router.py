@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, TypeVar
+
+from transport import ResilientTransport
+from utils import env_flag, percentile
+
+T = TypeVar("T")
+
+# "latency" (fastest healthy model by EWMA latency) or "priority" (pool order)
+LLM_ROUTING = os.getenv("LLM_ROUTING", "latency").lower()
+
+# Hedged requests: if the first model has not answered by its p95, ask the next one too
+LLM_HEDGE = env_flag("LLM_HEDGE", False)
+# Successful calls needed before a model's p95 is trusted as hedge delay
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+# Give up on one model after this many seconds (retries included) and fall back;
+# not applied once a stream has started delivering text
+LLM_ATTEMPT_TIMEOUT = float(os.getenv("LLM_ATTEMPT_TIMEOUT", "300"))
+# A model that just failed is tried last for this many seconds
+LLM_MODEL_COOLDOWN = float(os.getenv("LLM_MODEL_COOLDOWN", "60"))
+
+LATENCY_EWMA_ALPHA = 0.2
+LATENCY_SAMPLES = 200
+
+
+#-------------------------
+# MODEL ROUTER
+# Latency-aware model choice with fallback and optional hedging
+#-------------------------
+
+class _ModelState:
+    def __init__(self, name: str, transport: ResilientTransport):
+        self.name = name
+        self.transport = transport
+        self.ewma: float | None = None
+        self.latencies: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.successes = 0
+        self.failures = 0
+        self.cooldown_until = 0.0
+
+    def record_success(self, latency: float):
+        self.successes += 1
+        self.latencies.append(latency)
+        self.ewma = latency if self.ewma is None else LATENCY_EWMA_ALPHA * latency + (1 - LATENCY_EWMA_ALPHA) * self.ewma
+        self.cooldown_until = 0.0
+
+    def record_failure(self):
+        self.failures += 1
+        self.cooldown_until = time.monotonic() + LLM_MODEL_COOLDOWN
+
+    def p95(self) -> float | None:
+        if len(self.latencies) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return percentile(sorted(self.latencies), 0.95)
+
+    def stats(self) -> dict:
+        return {
+            "successes": self.successes,
+            "failures": self.failures,
+            "ewma_latency_seconds": round(self.ewma, 3) if self.ewma is not None else None,
+            "p95_latency_seconds": round(p95, 3) if (p95 := self.p95()) is not None else None,
+            "cooling_down": self.cooldown_until > time.monotonic(),
+            "transport": self.transport.stats(),
+        }
+
+
+class ModelRouter:
+    """
+    Sends each completion to one model of a pool and falls back to the next
+    model if it fails or exceeds LLM_ATTEMPT_TIMEOUT. Each model has its own
+    transport, so retries and the circuit breaker of one model do not block
+    the others.
+
+    With hedge=True and LLM_HEDGE enabled, a request that is still running
+    after the first model's p95 latency is also sent to the next model; the
+    first successful answer wins and the other request is cancelled.
+    """
+
+    def __init__(self, models: list[str], *, primary_transport: ResilientTransport | None = None):
+        if not models:
+            raise ValueError("Model pool must not be empty.")
+        self.models = [
+            _ModelState(name, primary_transport if i == 0 and primary_transport else ResilientTransport())
+            for i, name in enumerate(models)
+        ]
+        self.fallbacks = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @property
+    def primary(self) -> str:
+        return self.models[0].name
+
+    def candidates(self) -> list[_ModelState]:
+        """Models in the order they should be tried; cooling-down models come last."""
+        now = time.monotonic()
+        ready = [m for m in self.models if m.cooldown_until <= now]
+        cooling = sorted((m for m in self.models if m.cooldown_until > now), key=lambda m: m.cooldown_until)
+        if LLM_ROUTING == "latency":
+            # Measured models swap places by EWMA latency; models without measurements
+            # (e.g. a primary that failed before its first success) keep their pool
+            # position, so they are tried again once their cooldown ends
+            slots = [i for i, m in enumerate(ready) if m.ewma is not None]
+            for i, m in zip(slots, sorted((ready[i] for i in slots), key=lambda m: m.ewma)):
+                ready[i] = m
+        return ready + cooling
+
+    async def _attempt(
+        self,
+        state: _ModelState,
+        call: Callable[[str, ResilientTransport], Awaitable[T]],
+        should_fallback: Callable[[Exception], bool],
+    ) -> T:
+        started = time.perf_counter()
+        task = asyncio.ensure_future(call(state.name, state.transport))
+        try:
+            done, _ = await asyncio.wait({task}, timeout=LLM_ATTEMPT_TIMEOUT)
+            # The timeout only applies while the call can still fall back (e.g. before a stream's first delta)
+            if not done and should_fallback(TimeoutError()):
+                raise TimeoutError(f"{state.name} did not answer within {LLM_ATTEMPT_TIMEOUT:.0f}s")
+            result = await task
+        except Exception as e:
+            if should_fallback(e):
+                state.record_failure()
+            raise
+        finally:
+            if not task.done():
+                task.cancel()
+        state.record_success(time.perf_counter() - started)
+        return result
+
+    async def _hedged(
+        self,
+        first: _ModelState,
+        second: _ModelState,
+        delay: float,
+        call: Callable[[str, ResilientTransport], Awaitable[T]],
+        should_fallback: Callable[[Exception], bool],
+    ) -> tuple[T, _ModelState]:
+        tasks = {asyncio.ensure_future(self._attempt(first, call, should_fallback)): first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self.hedges += 1
+                logging.info(f"{first.name} slower than its p95 ({delay:.1f}s); hedging with {second.name}")
+                tasks[asyncio.ensure_future(self._attempt(second, call, should_fallback))] = second
+
+            pending = set(tasks)
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if tasks[task] is second:
+                            self.hedge_wins += 1
+                        return task.result(), tasks[task]
+                    error = task.exception()
+                    if not should_fallback(error):
+                        raise error
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def run(
+        self,
+        call: Callable[[str, ResilientTransport], Awaitable[T]],
+        *,
+        hedge: bool = False,
+        should_fallback: Callable[[Exception], bool] = lambda e: True,
+    ) -> tuple[T, str]:
+        """
+        Run call(model, transport) on the best model, falling back through the pool.
+        Errors for which should_fallback returns False are raised immediately.
+        Returns (result, model).
+        """
+        candidates = self.candidates()
+        last_error: Exception | None = None
+        i = 0
+        while i < len(candidates):
+            state = candidates[i]
+            if i > 0:
+                self.fallbacks += 1
+                logging.warning(f"Falling back to model {state.name} ({type(last_error).__name__}: {last_error})")
+
+            delay = state.p95() if hedge and LLM_HEDGE and i + 1 < len(candidates) else None
+            try:
+                if delay is None:
+                    return await self._attempt(state, call, should_fallback), state.name
+                result, used = await self._hedged(state, candidates[i + 1], delay, call, should_fallback)
+                return result, used.name
+            except Exception as e:
+                if not should_fallback(e):
+                    raise
+                last_error = e
+                # A failed hedge has already used the next model as well
+                i += 2 if delay is not None and candidates[i + 1].cooldown_until > time.monotonic() else 1
+        raise last_error
+
+    def stats(self) -> dict:
+        return {
+            "routing": LLM_ROUTING,
+            "hedging": LLM_HEDGE,
+            "primary": self.primary,
+            "fallbacks": self.fallbacks,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "models": {m.name: m.stats() for m in self.models},
+        }
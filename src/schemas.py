@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import List, Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
 
 
@@ -18,6 +18,11 @@ class ReadingLevel(str, Enum):
     beginner = "beginner"
     intermediate = "intermediate"
 
+class CacheMode(str, Enum):
+    use = "use"
+    refresh = "refresh"
+    bypass = "bypass"
+
 class SourceType(str, Enum):
     database = "database"
     excel = "excel"
@@ -44,10 +49,19 @@ class GeneratedText(BaseModel):
     word_count: int = 0
    
 
+class QualityMetrics(BaseModel):
+    word_count: int = Field(..., description="Words counted in the text.")
+    paragraph_count: int = Field(..., description="Paragraphs separated by blank lines.")
+    keyword_coverage: Optional[float] = Field(None, description="Share of the keywords that appear in the text.")
+    missing_keywords: List[str] = Field(default_factory=list, description="Keywords not found in the text.")
+    description_overlap: Optional[float] = Field(None, description="Share of the description's content words that appear in the text.")
+    passed: bool = Field(..., description="False if any check was flagged in the output's warnings.")
+
 class TokenUsage(BaseModel):
     prompt_tokens: int = 0
     completion_tokens: int = 0
     total_tokens: int = 0
+    model: Optional[str] = Field(None, description="Model(s) that answered, comma-separated if several were used.")
 
 class GenerateProjectTextOutput(BaseModel):
     project_page: dict[str, GeneratedText] = Field(..., description="Detailed project description for a public project page.")
@@ -55,3 +69,27 @@ class GenerateProjectTextOutput(BaseModel):
     used_keywords: Optional[List[str]]= Field(..., description="Keywords that appear in the text.")
     token_usage: Optional[TokenUsage] = Field(None, description="LLM token consumption for this generation.") 
     warnings: Optional[List[str]] = Field(None, description="Notes about uncertainty or sparse input.")
+    input_fingerprint: Optional[str] = Field(None, description="Fingerprint of the inputs (source text, keywords, prompt template version, model) the texts were generated from.")
+    model: Optional[str] = Field(None, description="Model(s) that generated the texts (may differ from the primary model after a fallback or hedge).")
+    quality: Optional[dict[str, dict[str, QualityMetrics]]] = Field(None, description="Inline quality metrics per section and language.")
+
+
+# -------------------------
+# BATCH OUTPUT SCHEMA
+# -------------------------
+
+class BatchItemResult(BaseModel):
+    project_id: str = Field(..., description="Project abbreviation (Abkürzung).")
+    status: Literal["ok", "error", "skipped"] = Field(..., description="Outcome of this project's generation ('skipped': inputs unchanged).")
+    error: Optional[str] = Field(None, description="Error message if the generation failed.")
+    token_usage: Optional[TokenUsage] = None
+    duration_seconds: float = 0.0
+
+class GenerateProjectTextsBatchOutput(BaseModel):
+    results: List[BatchItemResult] = Field(..., description="Per-project outcome, in request order.")
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    token_usage: TokenUsage = Field(default_factory=TokenUsage, description="Token usage summed over all successful projects.")
+    wall_clock_seconds: float = 0.0
+    max_concurrency: int = 1
@@ -1,9 +1,12 @@
 import sys
 import os
 import warnings
-# Import resource and tools to register them with the MCP app
+# Import resource and tools to register them with the MCP app.
+# Heavy dependencies (pandas, langcheck, openai) are imported on first use,
+# so the server answers `initialize` quickly.
 import resources
 import tools    
+import evaluation
 from mcp_app import mcp
 
 # Redirect all warnings to stderr so they don't corrupt the MCP JSON-RPC stream on stdout
@@ -17,6 +20,9 @@ os.environ["TOKENIZERS_PARALLELISM"] = "false"
 # SERVER ENTRYPOINT
 #-------------------------      
 
-
 if __name__ == "__main__":
+    # The project catalog (pandas/pyarrow) is loaded by the first request that needs it
+    # Opt-in: spawn the evaluation workers now so their models load before the first request
+    if evaluation.EVAL_PRELOAD_MODELS:
+        evaluation.start_workers()
     mcp.run()
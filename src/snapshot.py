@@ -0,0 +1,102 @@
+import argparse
+import json
+import logging
+import os
+from pathlib import Path
+
+_METADATA_KEY = b"project_snapshot"
+
+
+#-------------------------
+# COLUMNAR PROJECT SNAPSHOT
+# Arrow IPC copy of the Excel workbook
+#-------------------------
+
+def _pyarrow():
+    """Import pyarrow on first use; None if it is not installed."""
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc
+    except ImportError:  # optional: install with the "snapshot" extra
+        return None
+    return pa
+
+
+def _source_signature(source_path: str | Path) -> dict:
+    st = os.stat(source_path)
+    return {"source_mtime_ns": st.st_mtime_ns, "source_size": st.st_size}
+
+
+def build_snapshot(frame, *, source_path: str | Path, snapshot_path: str | Path, columns: tuple[str, ...]) -> Path:
+    """
+    Write the column-projected project frame to an Arrow IPC file.
+    The source workbook's mtime/size are stored in the schema metadata
+    so stale snapshots can be detected at load time.
+    """
+    pa = _pyarrow()
+    if pa is None:
+        raise RuntimeError("pyarrow is required to build the project snapshot (install the 'snapshot' extra).")
+
+    snapshot_path = Path(snapshot_path)
+    table = pa.Table.from_pandas(frame.astype("string"), preserve_index=False)
+    metadata = {**_source_signature(source_path), "columns": list(columns)}
+    table = table.replace_schema_metadata({_METADATA_KEY: json.dumps(metadata).encode("utf-8")})
+
+    # Write to a temporary file first so readers never map a half-written snapshot
+    tmp_path = snapshot_path.with_name(snapshot_path.name + ".tmp")
+    with pa.OSFile(str(tmp_path), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, snapshot_path)
+    return snapshot_path
+
+
+def load_snapshot(*, source_path: str | Path, snapshot_path: str | Path, columns: tuple[str, ...]):
+    """
+    Memory-map the snapshot and return it as a DataFrame.
+    Returns None if pyarrow is unavailable or the snapshot is missing,
+    unreadable or older than the source workbook.
+    """
+    snapshot_path = Path(snapshot_path)
+    if not snapshot_path.exists():
+        return None
+    pa = _pyarrow()
+    if pa is None:
+        return None
+
+    try:
+        with pa.memory_map(str(snapshot_path), "r") as source:
+            reader = pa.ipc.open_file(source)
+            # The staleness check only needs the schema; no record batch is read for a stale snapshot
+            metadata = json.loads((reader.schema.metadata or {}).get(_METADATA_KEY, b"{}"))
+            expected = {**_source_signature(source_path), "columns": list(columns)}
+            if any(metadata.get(k) != v for k, v in expected.items()):
+                logging.info(f"Project snapshot {snapshot_path} is stale — falling back to Excel.")
+                return None
+            return reader.read_all().to_pandas()
+    except (OSError, pa.ArrowInvalid, ValueError) as e:
+        logging.warning(f"Could not read project snapshot {snapshot_path}: {e}")
+        return None
+
+
+def main():
+    import resources
+
+    parser = argparse.ArgumentParser(description="Convert the project Excel workbook into a columnar snapshot.")
+    parser.add_argument("--excel", default=resources.EXCEL_PATH, help="Path to the source Excel workbook.")
+    parser.add_argument("--output", default=None, help="Snapshot path (defaults to SNAPSHOT_PATH or <excel>.arrow).")
+    args = parser.parse_args()
+
+    output = args.output or resources.snapshot_path_for(args.excel)
+    frame = resources.read_project_frame(args.excel)
+    path = build_snapshot(
+        frame,
+        source_path=args.excel,
+        snapshot_path=output,
+        columns=resources.PROJECT_COLUMNS,
+    )
+    print(f"Wrote {len(frame)} projects ({len(frame.columns)} columns) to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,198 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
 from pathlib import Path
+import contextlib
 import json
 import os
+import threading
+import uuid
 from schemas import GenerateProjectTextOutput
 
+try:
+    import fcntl
+except ImportError:  # Windows: writes are only serialised within one process
+    fcntl = None
+
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 BASE_DIR = Path(os.getenv("OUTPUT_DIR", PROJECT_ROOT / "src/outputs"))
 REFERENCES_DIR = Path(__file__).parent / "data" / "references"
 
+# "json" (one directory per project, default) or "sqlite" (versioned history)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json").lower()
+STORAGE_DB_PATH = Path(os.getenv("STORAGE_DB_PATH", BASE_DIR / "outputs.sqlite3"))
+# Lock files serialising a project's writes across processes (server, dashboard, reevaluate.py)
+LOCK_DIR = Path(os.getenv("STORAGE_LOCK_DIR", BASE_DIR / ".locks"))
+
+# Stored document kinds and their file names in the JSON layout
+DOCUMENT_KINDS = {"output": "output.json", "evaluation": "evaluation.json"}
+
+
+# ------------------------
+# STORAGE BACKENDS
+# ------------------------
+
+@dataclass(frozen=True)
+class DocumentStat:
+    """Cheap change marker of a stored document: signature changes whenever the content does."""
+    signature: tuple[int, int]
+    mtime: float
+
+
+class StorageBackend(ABC):
+    """
+    Store for generated outputs and evaluations, addressed by project ID and kind
+    ("output" or "evaluation"). Documents are written as dicts and read back as
+    the stored JSON bytes, so readers can serve them without re-serialising.
+    """
+
+    # True if listing_token() can miss changes and the project list should be re-scanned periodically
+    needs_polling = False
+
+    @abstractmethod
+    def write(self, project_id: str, kind: str, document: dict, *,
+              model: str | None = None, prompt_hash: str | None = None):
+        ...
+
+    @abstractmethod
+    def read(self, project_id: str, kind: str) -> bytes | None:
+        ...
+
+    @abstractmethod
+    def stat(self, project_id: str, kind: str) -> DocumentStat | None:
+        ...
+
+    @abstractmethod
+    def list_projects(self) -> list[str]:
+        """Sorted IDs of all projects with a stored output."""
+
+    @abstractmethod
+    def listing_token(self):
+        """Value that changes when projects are added or removed."""
+
+    def history(self, project_id: str, kind: str) -> list[dict]:
+        """Metadata of all stored versions, newest first."""
+        stat = self.stat(project_id, kind)
+        return [{"version": None, "created_at": stat.mtime}] if stat else []
+
+    def read_version(self, project_id: str, kind: str, version: int) -> bytes | None:
+        """A specific earlier version, if the backend keeps history."""
+        return None
+
+
+class JsonDirectoryStorage(StorageBackend):
+    """One directory per project holding output.json and evaluation.json (latest version only)."""
+
+    needs_polling = True
+
+    def __init__(self, base_dir: Path):
+        self.base_dir = base_dir
+
+    def _path(self, project_id: str, kind: str) -> Path:
+        return self.base_dir / project_id / DOCUMENT_KINDS[kind]
+
+    def write(self, project_id: str, kind: str, document: dict, *,
+              model: str | None = None, prompt_hash: str | None = None):
+        path = self._path(project_id, kind)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file and rename it, so readers never see a partial document
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(document, f, indent=2, ensure_ascii=False)
+            os.replace(tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+    def read(self, project_id: str, kind: str) -> bytes | None:
+        try:
+            return self._path(project_id, kind).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def stat(self, project_id: str, kind: str) -> DocumentStat | None:
+        try:
+            st = os.stat(self._path(project_id, kind))
+        except FileNotFoundError:
+            return None
+        return DocumentStat(signature=(st.st_mtime_ns, st.st_size), mtime=st.st_mtime)
+
+    def list_projects(self) -> list[str]:
+        if not self.base_dir.exists():
+            return []
+        with os.scandir(self.base_dir) as entries:
+            return sorted(
+                entry.name for entry in entries
+                if entry.is_dir() and os.path.exists(os.path.join(entry.path, "output.json"))
+            )
+
+    def listing_token(self):
+        # Changes when a project directory is created or removed, not when output.json
+        # first appears in an existing one (hence needs_polling)
+        try:
+            return os.stat(self.base_dir).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+
+_storage: StorageBackend | None = None
+
+
+def get_storage() -> StorageBackend:
+    """The backend selected by STORAGE_BACKEND, created on first use."""
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND == "sqlite":
+            from storage_sqlite import SqliteStorage
+            _storage = SqliteStorage(STORAGE_DB_PATH)
+        elif STORAGE_BACKEND == "json":
+            _storage = JsonDirectoryStorage(BASE_DIR)
+        else:
+            raise ValueError(f"Unknown STORAGE_BACKEND '{STORAGE_BACKEND}' (expected 'json' or 'sqlite')")
+    return _storage
+
 
 # ------------------------
 # FILE INPUT/OUTPUT STORAGE
 # ------------------------
 
+_project_locks: dict[str, threading.Lock] = {}
+_project_locks_guard = threading.Lock()
+# Projects whose write lock the current thread holds, so nested saves do not deadlock
+_held_locks = threading.local()
+
+
+@contextlib.contextmanager
+def project_write_lock(project_id: str):
+    """
+    Serialise read-check-write sequences on one project's output and evaluation
+    across threads (threading.Lock) and processes (flock on LOCK_DIR/<project_id>.lock).
+    Reentrant within a thread. The section must not await: on the event-loop
+    thread another coroutine would enter it as a nested holder.
+    """
+    held = _held_locks.__dict__.setdefault("projects", set())
+    if project_id in held:
+        yield
+        return
+    with _project_locks_guard:
+        lock = _project_locks.setdefault(project_id, threading.Lock())
+    with lock:
+        held.add(project_id)
+        try:
+            if fcntl is None:
+                yield
+                return
+            LOCK_DIR.mkdir(parents=True, exist_ok=True)
+            with open(LOCK_DIR / f"{project_id}.lock", "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+        finally:
+            held.discard(project_id)
+
+
 def load_reference_text(project_id: str) -> str | None:
     """
     Load human-written reference text for evaluation.
@@ -28,22 +209,52 @@ def save_generation(
     project_id: str,
     result: GenerateProjectTextOutput,
     evaluation: dict | None = None,
+    *,
+    model: str | None = None,
+    prompt_hash: str | None = None,
 ):
-    # Ensure output directory exists
-    BASE_DIR.mkdir(exist_ok=True)
+    # Output and evaluation are written together, so concurrent saves cannot interleave
+    with project_write_lock(project_id):
+        # --- Save JSON (ground truth for evaluation) ---
+        get_storage().write(project_id, "output", result.model_dump(), model=model, prompt_hash=prompt_hash)
+
+        # --- Save evaluation results if provided ---
+        if evaluation:
+            save_evaluation(project_id, evaluation)
+
+
+def save_evaluation(project_id: str, evaluation: dict):
+    """Store a project's evaluation (also used for the 'pending' placeholder)."""
+    with project_write_lock(project_id):
+        get_storage().write(project_id, "evaluation", evaluation)
+
+
+def _load(project_id: str, kind: str) -> dict | None:
+    raw = get_storage().read(project_id, kind)
+    return json.loads(raw) if raw is not None else None
+
+
+def load_evaluation(project_id: str) -> dict | None:
+    """Read a project's latest evaluation, or None if it does not exist."""
+    return _load(project_id, "evaluation")
 
-    # Create project-specific directory
-    project_dir = BASE_DIR / project_id
-    project_dir.mkdir(parents=True, exist_ok=True)
 
-    # --- Save JSON (ground truth for evaluation) ---
-    with (project_dir / "output.json").open("w", encoding="utf-8") as f:
-        json.dump(result.model_dump(), f, indent=2, ensure_ascii=False)
+def load_output(project_id: str) -> dict | None:
+    """Read a project's latest output, or None if it does not exist."""
+    return _load(project_id, "output")
 
-    # --- Save evaluation results if provided ---
-    if evaluation:
-        with (project_dir / "evaluation.json").open("w", encoding="utf-8") as f:
-            json.dump(evaluation, f, indent=2, ensure_ascii=False)
 
+def list_generated_projects() -> list[str]:
+    """Project IDs that have a stored output."""
+    return get_storage().list_projects()
 
 
+def generated_texts_from_output(output: dict) -> dict[str, dict[str, str]]:
+    """Extract section -> language -> text from a stored output document."""
+    return {
+        section: {
+            lang: entry.get("text", "") if isinstance(entry, dict) else (entry or "")
+            for lang, entry in (output.get(section) or {}).items()
+        }
+        for section in ("project_page", "faculty_teaser")
+    }
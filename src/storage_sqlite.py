@@ -0,0 +1,164 @@
+import argparse
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from storage import StorageBackend, DocumentStat, JsonDirectoryStorage, DOCUMENT_KINDS, BASE_DIR, STORAGE_DB_PATH
+
+# Bump together with a migration step in _migrate
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    project_id  TEXT    NOT NULL,
+    kind        TEXT    NOT NULL,
+    version     INTEGER NOT NULL,
+    created_at  REAL    NOT NULL,
+    model       TEXT,
+    prompt_hash TEXT,
+    document    TEXT    NOT NULL,
+    UNIQUE (project_id, kind, version)
+);
+CREATE INDEX IF NOT EXISTS idx_documents_model ON documents (model);
+CREATE INDEX IF NOT EXISTS idx_documents_prompt_hash ON documents (prompt_hash);
+CREATE INDEX IF NOT EXISTS idx_documents_created_at ON documents (created_at);
+"""
+
+
+#-------------------------
+# SQLITE STORAGE
+# Every write is kept as a new version row
+#-------------------------
+
+class SqliteStorage(StorageBackend):
+    """
+    Versioned store in a single SQLite database (WAL mode, so the dashboard can
+    read while the MCP server writes). Reads return the latest version; older
+    versions stay available through history() and read_version().
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._migrate(self._connection())
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _migrate(self, conn: sqlite3.Connection):
+        current = conn.execute("PRAGMA user_version").fetchone()[0]
+        if current > SCHEMA_VERSION:
+            raise RuntimeError(f"{self.path} has schema version {current}, newer than supported ({SCHEMA_VERSION})")
+        if current < 1:
+            conn.executescript(_SCHEMA)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def write(self, project_id: str, kind: str, document: dict, *,
+              model: str | None = None, prompt_hash: str | None = None):
+        if kind not in DOCUMENT_KINDS:
+            raise ValueError(f"Unknown document kind '{kind}'")
+        payload = json.dumps(document, indent=2, ensure_ascii=False)
+        conn = self._connection()
+        # IMMEDIATE takes the write lock up front, so the next version number cannot race
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                """
+                INSERT INTO documents (project_id, kind, version, created_at, model, prompt_hash, document)
+                SELECT ?, ?, COALESCE(MAX(version), 0) + 1, ?, ?, ?, ?
+                FROM documents WHERE project_id = ? AND kind = ?
+                """,
+                (project_id, kind, time.time(), model, prompt_hash, payload, project_id, kind),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _latest(self, project_id: str, kind: str, columns: str):
+        return self._connection().execute(
+            f"SELECT {columns} FROM documents WHERE project_id = ? AND kind = ? ORDER BY version DESC LIMIT 1",
+            (project_id, kind),
+        ).fetchone()
+
+    def read(self, project_id: str, kind: str) -> bytes | None:
+        row = self._latest(project_id, kind, "document")
+        return row[0].encode("utf-8") if row else None
+
+    def read_version(self, project_id: str, kind: str, version: int) -> bytes | None:
+        row = self._connection().execute(
+            "SELECT document FROM documents WHERE project_id = ? AND kind = ? AND version = ?",
+            (project_id, kind, version),
+        ).fetchone()
+        return row[0].encode("utf-8") if row else None
+
+    def stat(self, project_id: str, kind: str) -> DocumentStat | None:
+        row = self._latest(project_id, kind, "id, version, created_at")
+        return DocumentStat(signature=(row[0], row[1]), mtime=row[2]) if row else None
+
+    def list_projects(self) -> list[str]:
+        rows = self._connection().execute(
+            "SELECT DISTINCT project_id FROM documents WHERE kind = 'output' ORDER BY project_id"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def listing_token(self):
+        # Row IDs only grow, so the highest output row changes whenever a project is added
+        return self._connection().execute("SELECT MAX(id) FROM documents WHERE kind = 'output'").fetchone()[0]
+
+    def history(self, project_id: str, kind: str) -> list[dict]:
+        rows = self._connection().execute(
+            """
+            SELECT version, created_at, model, prompt_hash, length(document)
+            FROM documents WHERE project_id = ? AND kind = ? ORDER BY version DESC
+            """,
+            (project_id, kind),
+        ).fetchall()
+        return [
+            {"version": v, "created_at": created_at, "model": model, "prompt_hash": prompt_hash, "size": size}
+            for v, created_at, model, prompt_hash, size in rows
+        ]
+
+
+def import_json_directory(source: JsonDirectoryStorage, target: SqliteStorage) -> int:
+    """Copy the latest output/evaluation of every project in a JSON directory into SQLite."""
+    imported = 0
+    for project_id in source.list_projects():
+        for kind in DOCUMENT_KINDS:
+            raw = source.read(project_id, kind)
+            if raw is None:
+                continue
+            try:
+                target.write(project_id, kind, json.loads(raw))
+            except json.JSONDecodeError as e:
+                logging.warning(f"Skipping unreadable {kind} of {project_id}: {e}")
+                continue
+            imported += 1
+    return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import the JSON output directory into the SQLite store.")
+    parser.add_argument("--source", default=str(BASE_DIR), help="JSON output directory (default: OUTPUT_DIR).")
+    parser.add_argument("--db", default=str(STORAGE_DB_PATH), help="SQLite database (default: STORAGE_DB_PATH).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    count = import_json_directory(JsonDirectoryStorage(Path(args.source)), SqliteStorage(Path(args.db)))
+    logging.info(f"Imported {count} documents into {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#-------------------------
+# INCREMENTAL JSON STRUCTURE CHECKS
+# Used while consuming a streamed LLM response
+#-------------------------
+
+SECTIONS = ("project_page", "faculty_teaser")
+
+
+class StreamStructureError(RuntimeError):
+    """Raised as soon as a streamed response can no longer match the required JSON layout."""
+
+
+class GenerationStreamTracker:
+    """
+    Character-level JSON scanner that follows the expected output layout:
+
+        {"project_page": {"<lang>": {...}}, "faculty_teaser": {"<lang>": {...}}, ...}
+
+    feed() returns the (section, language) entries whose objects were closed by
+    the new chunk and raises StreamStructureError on the first clear violation,
+    so the caller can abort the stream instead of paying for the rest of it.
+    """
+
+    def __init__(self, languages: list[str]):
+        self.languages = list(languages)
+        self.completed: list[tuple[str, str]] = []
+        self._stack: list[dict] = []
+        self._in_string = False
+        self._escape = False
+        self._string_buf: list[str] = []
+        self._started = False
+        self._finished = False
+        self._fence = False
+
+    @property
+    def total_entries(self) -> int:
+        return len(SECTIONS) * len(self.languages)
+
+    def _path(self) -> list[str]:
+        return [frame["key"] for frame in self._stack if frame["type"] == "object" and frame["key"] is not None]
+
+    def _fail(self, reason: str):
+        raise StreamStructureError(reason)
+
+    def _on_key(self, key: str):
+        depth = len(self._stack)
+        # Other top-level keys (e.g. an echoed project_id) are ignored, like the parser does
+        if depth == 2 and self._stack[0]["key"] in SECTIONS and key not in self.languages:
+            self._fail(f"unexpected language '{key}' in {self._stack[0]['key']}")
+
+    def _on_value_start(self, char: str):
+        """Check the first character of a value against the expected container type."""
+        depth = len(self._stack)
+        if depth == 1 and self._stack[0]["key"] in SECTIONS and char != "{":
+            self._fail(f"{self._stack[0]['key']} must be an object")
+        if depth == 2 and self._stack[0]["key"] in SECTIONS and char != "{":
+            self._fail(f"{self._stack[0]['key']}.{self._stack[1]['key']} must be an object")
+
+    def _on_object_closed(self, path: list[str]):
+        if len(path) == 2 and path[0] in SECTIONS:
+            self.completed.append((path[0], path[1]))
+            return [(path[0], path[1])]
+        return []
+
+    def _check_complete(self):
+        missing = [
+            f"{section}.{lang}"
+            for section in SECTIONS
+            for lang in self.languages
+            if (section, lang) not in self.completed
+        ]
+        if missing:
+            self._fail(f"response closed without {', '.join(missing)}")
+
+    def feed(self, chunk: str) -> list[tuple[str, str]]:
+        events: list[tuple[str, str]] = []
+        for char in chunk:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    frame = self._stack[-1] if self._stack else None
+                    if frame and frame["type"] == "object" and frame["expect"] == "key":
+                        key = "".join(self._string_buf)
+                        self._on_key(key)
+                        frame["key"] = key
+                        frame["expect"] = "colon"
+                    continue
+                self._string_buf.append(char)
+                continue
+
+            if not self._started:
+                # Tolerate a leading markdown code fence (```json)
+                if self._fence:
+                    if char == "\n":
+                        self._fence = False
+                    continue
+                if char.isspace():
+                    continue
+                if char == "`":
+                    self._fence = True
+                    continue
+                if char != "{":
+                    self._fail(f"response does not start with a JSON object (got {char!r})")
+                self._started = True
+                self._stack.append({"type": "object", "key": None, "expect": "key"})
+                continue
+
+            if self._finished:
+                if not (char.isspace() or char == "`"):
+                    self._fail("unexpected content after the JSON object")
+                continue
+
+            if char.isspace():
+                continue
+
+            frame = self._stack[-1]
+            if frame["type"] == "object" and frame["expect"] == "value":
+                self._on_value_start(char)
+                frame["expect"] = "comma"
+
+            if char == '"':
+                self._in_string = True
+                self._string_buf = []
+            elif char == "{":
+                self._stack.append({"type": "object", "key": None, "expect": "key"})
+            elif char == "[":
+                self._stack.append({"type": "array", "key": None, "expect": None})
+            elif char in "}]":
+                closed = self._stack.pop()
+                path = self._path()
+                if (char == "}") != (closed["type"] == "object"):
+                    self._fail("mismatched brackets")
+                if closed["type"] == "object":
+                    events.extend(self._on_object_closed(path))
+                if not self._stack:
+                    self._finished = True
+                    self._check_complete()
+            elif char == ":" and frame["type"] == "object":
+                if frame["expect"] != "colon":
+                    self._fail("unexpected ':'")
+                frame["expect"] = "value"
+            elif char == "," and frame["type"] == "object":
+                frame["key"] = None
+                frame["expect"] = "key"
+        return events
+
+    def finish(self):
+        """Call once the stream has ended; raises if the JSON object was never closed."""
+        if not self._finished:
+            self._fail("stream ended before the JSON object was complete")
+
+
+def completed_entries(text: str, languages: list[str]) -> list[tuple[str, str]]:
+    """
+    (section, language) entries whose JSON objects are complete in a finished
+    response. Scanning stops at the first structural violation, so entries after
+    a defect or in truncated output are not reported.
+    """
+    tracker = GenerationStreamTracker(languages)
+    start = text.find("{")
+    if start == -1:
+        return []
+    try:
+        tracker.feed(text[start:])
+    except StreamStructureError:
+        pass
+    return tracker.completed
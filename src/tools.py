@@ -1,150 +1,488 @@
 from mcp_app import mcp
-from schemas import (GenerateProjectTextInput, GenerateProjectTextOutput, GeneratedText, TokenUsage)
-from context import build_context
-from llm import generate_text_from_context
-from resources import projects_resource
-from evaluation import evaluate_generated_vs_reference
-from utils import normalize_generated_entry, extract_keywords
-from storage import save_generation, load_reference_text
-import json
+from mcp.server.fastmcp import Context
+from schemas import (GenerateProjectTextInput, GenerateProjectTextOutput, GeneratedText, TokenUsage,
+                     BatchItemResult, GenerateProjectTextsBatchOutput, CacheMode)
+from context import (build_context, build_section_context, output_json_schema, entry_json_schema, prompt_hash,
+                     input_fingerprint)
+from llm import generate_text_from_context, model as llm_model, models as llm_models
+from cache import response_cache
+from streaming import GenerationStreamTracker, StreamStructureError, completed_entries, SECTIONS as REQUIRED_SECTIONS
+from resources import get_project, catalog
+from evaluation import evaluate_in_worker
+from utils import normalize_generated_entry, extract_keywords, repair_json
+from tracing import span, profiled
+from quality import compute_quality_metrics
+from coalescing import generation_flights
+from storage import (BASE_DIR, save_generation, save_evaluation, load_evaluation, load_reference_text,
+                     load_output, generated_texts_from_output, project_write_lock)
+import asyncio
+import hashlib
 import logging
+import os
+import time
+import uuid
 
 logging.basicConfig(level=logging.INFO)
+
+# Default number of projects generated concurrently by the batch tool
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+
+# Extra attempts for a single failed part in fan-out mode
+FAN_OUT_MAX_RETRIES = int(os.getenv("FAN_OUT_MAX_RETRIES", "1"))
+
 #-------------------------
 # TOOLS
 #-------------------------
+def _sum_token_usage(usages: list[dict | None]) -> dict | None:
+    """Add up token usage dicts, ignoring missing entries; the models used are joined."""
+    usages = [u for u in usages if u]
+    if not usages:
+        return None
+    totals = {
+        key: sum(u.get(key, 0) for u in usages)
+        for key in ("prompt_tokens", "completion_tokens", "total_tokens")
+    }
+    models = dict.fromkeys(u["model"] for u in usages if u.get("model"))
+    totals["model"] = ",".join(models) or None
+    return totals
+
+
+async def _generate_single(
+    request: GenerateProjectTextInput,
+    *,
+    cache_mode: CacheMode,
+    stream: bool,
+    ctx: Context | None,
+) -> tuple[dict, dict | None]:
+    """Request all sections and languages in one completion."""
+
+    #--- Build LLM context ---
+    logging.info("Building context prompt from project metadata...")
+    with span("build_context"):
+        messages = build_context(request)
+    logging.info(f"Context prompt built ({sum(len(m['content']) for m in messages)} characters). Invoking LLM...")
+    
+    #--- Invoke and Generate text via LLM (async) ---
+    required_langs = [lang.value for lang in request.languages]
+    tracker = GenerationStreamTracker(required_langs)
+    received: list[str] = []
+
+    async def on_chunk(delta: str):
+        received.append(delta)
+        for section, lang in tracker.feed(delta):
+            logging.info(f" Streamed {section}.{lang} complete.")
+            if ctx:
+                await ctx.report_progress(
+                    len(tracker.completed),
+                    tracker.total_entries,
+                    message=f"{section}.{lang} complete",
+                )
+
+    logging.info(f"Sending prompt to OpenAI API{' (streaming)' if stream else ''}...")
+    llm_result = None
+    token_usage = None
+    cache_key = None
+    layout_error = False
+    try:
+        with span("llm_call", stream=stream):
+            llm_result = await generate_text_from_context(
+                messages,
+                cache_mode=cache_mode,
+                stream=stream,
+                on_chunk=on_chunk,
+                json_schema={"name": "project_texts", "schema": output_json_schema(required_langs)},
+                project_id=request.project_id,
+            )
+            if stream:
+                tracker.finish()
+    except StreamStructureError as e:
+        # Keep the entries that were already complete; the rest is re-requested below
+        logging.warning(f"Aborted LLM stream: {e} ({len(tracker.completed)} entries complete)")
+        layout_error = True
+        # Estimated usage of an aborted stream, or the key of a rejected cached response
+        # (see generate_text_from_context)
+        token_usage = getattr(e, "token_usage", None)
+        cache_key = getattr(e, "cache_key", None)
+
+    if llm_result:
+        raw_response = llm_result["text"]
+        token_usage = llm_result["token_usage"]
+        cache_key = llm_result["cache_key"]
+        logging.info(
+            f"LLM response {'loaded from cache' if llm_result['cache_hit'] else 'received'} "
+            f"({len(raw_response)} characters)."
+        )
+    else:
+        raw_response = "".join(received)
+    
+    # --- Guardrails / validation checks ---
+    with span("parse", characters=len(raw_response)):
+        # Only entries whose JSON objects were closed count as complete (not truncated)
+        completed = tracker.completed if stream else completed_entries(raw_response, required_langs)
+        try:
+            logging.info("Parsing JSON response from LLM...")
+            parsed = repair_json(raw_response)
+            logging.info("JSON parsed successfully.")
+        except ValueError as e:
+            logging.error(f"Invalid JSON response from LLM: {e}")
+            parsed = {}
+
+        for section in REQUIRED_SECTIONS:
+            entries = parsed.get(section) if isinstance(parsed.get(section), dict) else {}
+            parsed[section] = {
+                lang: entry for lang, entry in entries.items()
+                if (section, lang) in completed and _is_valid_entry(entry)
+            }
+
+    missing = [
+        (section, lang)
+        for section in REQUIRED_SECTIONS
+        for lang in required_langs
+        if lang not in parsed[section]
+    ]
+    # Broken layout or nothing usable: do not serve this response from the cache again
+    if cache_key and (layout_error or len(missing) == len(REQUIRED_SECTIONS) * len(required_langs)):
+        response_cache.discard(cache_key)
+    if not missing:
+        return parsed, token_usage
+
+    # --- Partial retry: re-request only the missing sections/languages ---
+    labels = ", ".join(f"{section}.{lang}" for section, lang in missing)
+    logging.warning(f"LLM response incomplete; re-requesting {labels}...")
+    with span("llm_call_parts", parts=len(missing)):
+        results = await asyncio.gather(*(
+            _generate_part(request, section, lang, cache_mode=cache_mode)
+            for section, lang in missing
+        ))
+
+    usages = [token_usage]
+    warnings = parsed.get("warnings") if isinstance(parsed.get("warnings"), list) else []
+    for (section, lang), (entry, part_usages) in zip(missing, results):
+        for warning in entry.pop("warnings", None) or []:
+            warnings.append(f"{section}.{lang}: {warning}")
+        parsed[section][lang] = entry
+        usages.extend(part_usages)
+    warnings.append(f"Re-requested separately: {labels}")
+    parsed["warnings"] = warnings
+
+    return parsed, _sum_token_usage(usages)
+
+
+def _is_valid_entry(entry) -> bool:
+    return isinstance(entry, dict) and bool(str(entry.get("text", "")).strip())
+
+
+async def _generate_part(
+    request: GenerateProjectTextInput,
+    section: str,
+    lang: str,
+    *,
+    cache_mode: CacheMode,
+) -> tuple[dict, list[dict | None]]:
+    """
+    Request a single (section, language) entry, retrying only this part
+    if the response is not a valid entry object.
+    """
+    with span("build_context", section=section, language=lang):
+        messages = build_section_context(request, section, lang)
+    usages = []
+    last_error = None
+    for attempt in range(1, FAN_OUT_MAX_RETRIES + 2):
+        with span("llm_call", section=section, language=lang, attempt=attempt):
+            llm_result = await generate_text_from_context(
+                messages,
+                cache_mode=cache_mode,
+                json_schema={"name": "project_text_entry", "schema": entry_json_schema(with_warnings=True)},
+                project_id=request.project_id,
+            )
+        usages.append(llm_result["token_usage"])
+        try:
+            with span("parse", section=section, language=lang):
+                entry = repair_json(llm_result["text"])
+            if not _is_valid_entry(entry):
+                raise ValueError("response has no 'text' field")
+            return entry, usages
+        except ValueError as e:
+            logging.warning(f"Invalid {section}.{lang} part (attempt {attempt}): {e}")
+            response_cache.discard(llm_result["cache_key"])
+            last_error = e
+            # Never serve the rejected response from the cache again
+            if cache_mode == CacheMode.use:
+                cache_mode = CacheMode.refresh
+    raise RuntimeError(f"LLM returned an invalid {section}.{lang} part.") from last_error
+
+
+async def _generate_fan_out(
+    request: GenerateProjectTextInput,
+    *,
+    cache_mode: CacheMode,
+    ctx: Context | None,
+) -> tuple[dict, dict | None]:
+    """
+    Request every (section, language) entry as its own concurrent completion
+    and merge them into the single-completion response layout.
+    """
+    parts = [
+        (section, lang.value)
+        for section in REQUIRED_SECTIONS
+        for lang in request.languages
+    ]
+    logging.info(f"Fan-out mode: requesting {len(parts)} parts concurrently...")
+    done = 0
+
+    async def run_part(section: str, lang: str):
+        nonlocal done
+        result = await _generate_part(request, section, lang, cache_mode=cache_mode)
+        done += 1
+        logging.info(f" Part {section}.{lang} complete ({done}/{len(parts)}).")
+        if ctx:
+            await ctx.report_progress(done, len(parts), message=f"{section}.{lang} complete")
+        return result
+
+    results = await asyncio.gather(*(run_part(section, lang) for section, lang in parts))
+
+    parsed: dict = {"project_page": {}, "faculty_teaser": {}, "warnings": []}
+    usages = []
+    for (section, lang), (entry, part_usages) in zip(parts, results):
+        for warning in entry.pop("warnings", None) or []:
+            parsed["warnings"].append(f"{section}.{lang}: {warning}")
+        parsed[section][lang] = entry
+        usages.extend(part_usages)
+
+    parsed["warnings"] = parsed["warnings"] or None
+    return parsed, _sum_token_usage(usages)
+
+
 # Core tool to generate project texts and evaluate results
 @mcp.tool()
 async def generate_project_text(
     request: GenerateProjectTextInput,
     *,
     reference_text: str | None = None, 
+    cache_mode: CacheMode = CacheMode.use,
+    stream: bool = False,
+    fan_out: bool = False,
+    ctx: Context | None = None,
     ) -> GenerateProjectTextOutput:
     """
     Generates both a detailed project page description and a short faculty teaser
     for a single research project.
+    cache_mode: "use" (default) reuses an identical earlier LLM response,
+    "refresh" regenerates and overwrites it, "bypass" skips the cache entirely.
+    stream: consume the LLM response incrementally, report a progress notification
+    per completed section/language and abort as soon as the JSON structure breaks.
+    fan_out: request each section/language as its own concurrent completion;
+    only a part that fails validation is retried.
+    Concurrent calls for the same project with identical inputs share one
+    generation (the first caller's options apply) instead of running twice.
     """
-  
+    reference_hash = hashlib.sha256((reference_text or "").encode("utf-8")).hexdigest()
+    key = f"{request.project_id}:{input_fingerprint(request, llm_model)}:{reference_hash}"
+
+    async def traced_generation() -> GenerateProjectTextOutput:
+        with profiled(BASE_DIR / request.project_id), span(
+            "generate_project_text",
+            project_id=request.project_id,
+            stream=stream,
+            fan_out=fan_out,
+        ):
+            return await _run_generation(
+                request,
+                reference_text=reference_text,
+                cache_mode=cache_mode,
+                stream=stream,
+                fan_out=fan_out,
+                ctx=ctx,
+            )
+
+    return await generation_flights.do(key, traced_generation)
+
+
+async def _run_generation(
+    request: GenerateProjectTextInput,
+    *,
+    reference_text: str | None,
+    cache_mode: CacheMode,
+    stream: bool,
+    fan_out: bool,
+    ctx: Context | None,
+) -> GenerateProjectTextOutput:
     logging.info(
         f"Generating text for project: {request.project_id} - {request.project_description[:50]}... "
         f"(languages={request.languages}, audience={request.target_audience})"
     )
+
+    if fan_out:
+        parsed, token_usage = await _generate_fan_out(request, cache_mode=cache_mode, ctx=ctx)
+    else:
+        parsed, token_usage = await _generate_single(request, cache_mode=cache_mode, stream=stream, ctx=ctx)
     
-    #--- Build LLM context ---
-    logging.info("Building context prompt from project metadata...")
-    prompt = build_context(request)
-    logging.info(f"Context prompt built ({len(prompt)} characters). Invoking LLM...")
-    
-    #--- Invoke and Generate text via LLM (async) ---
-    logging.info("Sending prompt to OpenAI API...")
-    llm_result = await generate_text_from_context(prompt)
-    raw_response = llm_result["text"]
-    token_usage = llm_result["token_usage"]
-    logging.info(f"LLM response received ({len(raw_response)} characters).")
-    
-    try:
-        logging.info("Parsing JSON response from LLM...")
-        parsed= json.loads(raw_response)
-        logging.info("JSON parsed successfully.")
-    except json.JSONDecodeError as e:
-        logging.error("Invalid JSON response from LLM.")
-        raise RuntimeError("LLM returned invalid JSON.") from e
-    
-    # --- Guardrails / validation checks ---
-    #  Define required  sections
-    required_sections = ["project_page", "faculty_teaser"]
-    required_langs = [lang.value for lang in request.languages]  
-
-    # Check sections exist
-    missing_sections = [s for s in required_sections if s not in parsed]
-    if missing_sections:
-        raise RuntimeError(f"LLM response missing required sections: {', '.join(missing_sections)}")
-
-    #  Check all requested languages are present in each section
-    for section in required_sections:
-        missing_langs = [lang for lang in required_langs if lang not in parsed.get(section, {})]
-        if missing_langs:
-            raise RuntimeError(f"LLM response missing languages {missing_langs} in {section}")
-    
-    # --- Normalize + parse project_page ---
-    logging.info("Processing project page descriptions...")
-    project_page = {}
-    for lang, entry in parsed.get("project_page", {}).items():
-        entry = normalize_generated_entry(entry)
-        project_page[lang] = GeneratedText(**entry)
-        logging.info(f" {lang.upper()}: {entry.get('word_count', 0)} words, "
-                     f"{entry.get('reading_level', 'N/A')} level")
+    with span("normalize"):
+        # --- Normalize + parse project_page ---
+        logging.info("Processing project page descriptions...")
+        project_page = {}
+        for lang, entry in parsed.get("project_page", {}).items():
+            entry = normalize_generated_entry(entry)
+            project_page[lang] = GeneratedText(**entry)
+            logging.info(f" {lang.upper()}: {entry.get('word_count', 0)} words, "
+                         f"{entry.get('reading_level', 'N/A')} level")
+            
+        # --- Normalize + parse faculty_teaser ---
+        logging.info("Processing faculty teaser descriptions...")
+        faculty_teaser = {}
+        for lang, entry in parsed.get("faculty_teaser", {}).items():
+            entry = normalize_generated_entry(entry)
+            faculty_teaser[lang] = GeneratedText(**entry)
+            logging.info(f" {lang.upper()}: {entry.get('word_count', 0)} words, "
+                         f"{entry.get('reading_level', 'N/A')} level")
+
+        # --- Inline quality checks (word/paragraph counts, keywords, description overlap) ---
+        with span("quality"):
+            quality, quality_warnings = compute_quality_metrics(
+                {
+                    "project_page": {lang: entry.text for lang, entry in project_page.items()},
+                    "faculty_teaser": {lang: entry.text for lang, entry in faculty_teaser.items()},
+                },
+                keywords=request.keywords,
+                description=request.project_description,
+            )
+        if quality_warnings:
+            logging.warning(f"Quality checks flagged {len(quality_warnings)} issue(s): {'; '.join(quality_warnings)}")
         
-    # --- Normalize + parse faculty_teaser ---
-    logging.info("Processing faculty teaser descriptions...")
-    faculty_teaser = {}
-    for lang, entry in parsed.get("faculty_teaser", {}).items():
-        entry = normalize_generated_entry(entry)
-        faculty_teaser[lang] = GeneratedText(**entry)
-        logging.info(f" {lang.upper()}: {entry.get('word_count', 0)} words, "
-                     f"{entry.get('reading_level', 'N/A')} level")
-    
-    #--- Creates the final output ---
-    logging.info("Creating final output object...")
-    result = GenerateProjectTextOutput(
-        project_page=project_page,
-        faculty_teaser=faculty_teaser,
-        used_keywords=request.keywords,
-        warnings=parsed.get("warnings"),
-        token_usage=TokenUsage(**token_usage) if token_usage else None,
-    )
+        #--- Creates the final output ---
+        logging.info("Creating final output object...")
+        # The fingerprint names the model that actually answered (see _current_fingerprint)
+        used_model = (token_usage or {}).get("model") or llm_model
+        result = GenerateProjectTextOutput(
+            project_page=project_page,
+            faculty_teaser=faculty_teaser,
+            used_keywords=request.keywords,
+            warnings=[*(parsed.get("warnings") or []), *quality_warnings] or None,
+            quality=quality,
+            token_usage=TokenUsage(**token_usage) if token_usage else None,
+            input_fingerprint=input_fingerprint(request, used_model),
+            model=used_model,
+        )
     
     #--- Evaluation (optional) if reference text provided ---
+    # Runs in the background worker pool; evaluation.json is marked "pending" until it finishes
     evaluation = None
     if reference_text:
-        logging.info("Reference text provided. Running evaluation...")
-        evaluation = evaluate_generated_vs_reference(
-            project_id=request.project_id,
-            generated_text=project_page["de"].text,
-            human_reference_text=reference_text,
-        )
-        logging.info("Evaluation complete.")
+        evaluation = {
+            "project_id": request.project_id,
+            "status": "pending",
+            "evaluation_id": uuid.uuid4().hex,
+            "metrics": None,
+            "reason": "Evaluation is running in the background.",
+        }
         
     #--- Save outputs and evaluation ---
     logging.info("Saving generation results to storage...")
-    save_generation(
-        project_id=request.project_id,
-        result=result,
-        evaluation=evaluation,
-    )
+    with span("save_generation"):
+        save_generation(
+            project_id=request.project_id,
+            result=result,
+            evaluation=evaluation,
+            model=result.model,
+            prompt_hash=prompt_hash(request),
+        )
+
+    if evaluation:
+        logging.info("Reference text provided. Scheduling background evaluation...")
+        _schedule_evaluation(
+            project_id=request.project_id,
+            evaluation_id=evaluation["evaluation_id"],
+            generated_texts=generated_texts_from_output(result.model_dump()),
+            human_reference_text=reference_text,
+        )
     logging.info(f"Generation complete for project {request.project_id}.")
     
     return result
 
 
+# Strong references to running evaluation tasks so they are not garbage-collected
+_evaluation_tasks: set[asyncio.Task] = set()
+
+
+async def _run_evaluation(
+    *,
+    project_id: str,
+    evaluation_id: str,
+    generated_texts: dict[str, dict[str, str]],
+    human_reference_text: str,
+):
+    try:
+        with span("evaluate", project_id=project_id):
+            evaluation = await evaluate_in_worker(
+                project_id=project_id,
+                generated_texts=generated_texts,
+                human_reference_text=human_reference_text,
+            )
+    except Exception as e:
+        # e.g. a crashed worker process (BrokenProcessPool)
+        logging.error(f"Background evaluation failed for {project_id}: {e}")
+        evaluation = {
+            "project_id": project_id,
+            "status": "failed",
+            "metrics": None,
+            "reason": f"Evaluation error: {e}",
+        }
+
+    # A newer generation may have replaced this one while the evaluation was running
+    with project_write_lock(project_id):
+        current = load_evaluation(project_id)
+        if current and current.get("evaluation_id") != evaluation_id:
+            logging.info(f"Discarding stale evaluation for {project_id}.")
+            return
+        save_evaluation(project_id, {**evaluation, "evaluation_id": evaluation_id})
+    logging.info(f"Evaluation {evaluation['status']} for {project_id}.")
+
+
+def _schedule_evaluation(**kwargs):
+    task = asyncio.create_task(_run_evaluation(**kwargs))
+    _evaluation_tasks.add(task)
+    task.add_done_callback(_evaluation_tasks.discard)
+
+
+async def wait_for_evaluations():
+    """Wait until all background evaluations have been written (used by scripts and benchmarks)."""
+    while _evaluation_tasks:
+        await asyncio.gather(*list(_evaluation_tasks), return_exceptions=True)
+
+
+def _build_request_from_project(project: dict) -> GenerateProjectTextInput:
+    """Map a catalog record onto the generation input schema."""
+    return GenerateProjectTextInput(
+        project_id=project["project_id"],
+        project_description=project["Beschreibung"],
+        keywords=extract_keywords(project),
+        target_audience=["industry", "general_public"],
+        languages=["de", "en"],
+        source_type="excel", 
+    )
+
+
 # Adapter tool wrapper to generate project text from project ID
 @mcp.tool()
 async def generate_project_text_from_project_id(
     project_id: str,
+    cache_mode: CacheMode = CacheMode.use,
+    stream: bool = False,
+    fan_out: bool = False,
+    ctx: Context | None = None,
 ) -> GenerateProjectTextOutput:
     """
     Adapter tool:
-    - Reads project metadata from mcp://projects
+    - Reads project metadata from the cached mcp://projects catalog
     - Extracts semantic values
     - Loads reference text from src/data/references/{Abkürzung}.txt if exists
     - Calls generate_project_text with a proper request
     """
-    projects = projects_resource()
-    project = next(
-        (p for p in projects if p["project_id"].lower() == project_id.lower()),
-        None,
-    )
+    project = get_project(project_id)
     if not project:
         raise ValueError(f"Project not found: {project_id}")
     
-    request = GenerateProjectTextInput(
-        project_id=project["project_id"],
-        project_description=project["Beschreibung"],
-        keywords=extract_keywords(project),
-        target_audience=["industry", "general_public"],
-        languages=["de", "en"],
-        source_type="excel", 
-    )
+    request = _build_request_from_project(project)
 
     # Load reference text from storage
     reference_text = load_reference_text(project_id)
@@ -154,5 +492,133 @@ async def generate_project_text_from_project_id(
         logging.info(f"No reference file found for {project_id} — evaluation will be skipped")
         
 
-    return await generate_project_text(request, reference_text=reference_text)
+    return await generate_project_text(
+        request,
+        reference_text=reference_text,
+        cache_mode=cache_mode,
+        stream=stream,
+        fan_out=fan_out,
+        ctx=ctx,
+    )
+
+
+def _current_fingerprint(project: dict, stored_model: str | None) -> str:
+    """
+    Input fingerprint of a catalog entry for comparison with a stored output.
+    Uses the model(s) that wrote the output while they are still in the pool,
+    so a fallback answer stays up to date; otherwise (or for outputs without
+    a model) the primary model, so a changed pool regenerates the output.
+    """
+    used = stored_model.split(",") if stored_model else []
+    model = stored_model if used and all(m in llm_models for m in used) else llm_model
+    return input_fingerprint(_build_request_from_project(project), model)
+
+
+# Batch tool to regenerate many projects in one call
+@mcp.tool()
+async def generate_project_texts_batch(
+    project_ids: list[str] | str = "all",
+    max_concurrency: int = BATCH_MAX_CONCURRENCY,
+    cache_mode: CacheMode = CacheMode.use,
+    fan_out: bool = False,
+    only_changed: bool = False,
+    ctx: Context | None = None,
+) -> GenerateProjectTextsBatchOutput:
+    """
+    Generates texts for several projects concurrently.
+    - project_ids: list of project abbreviations, or "all" for the whole catalog
+    - max_concurrency: maximum number of LLM generations in flight at once
+    - cache_mode: LLM response cache behaviour, see generate_project_text
+    - fan_out: per-section/language completions, see generate_project_text
+    - only_changed: skip projects whose stored output was generated from the same
+      inputs (description, keywords, prompt template version, model) as the
+      current catalog entry; only new and changed projects are regenerated
+    A failing project is reported in its result entry and does not abort the batch.
+    A progress notification is sent each time a project finishes.
+    """
+    if isinstance(project_ids, str):
+        if project_ids.strip().lower() != "all":
+            raise ValueError('project_ids must be a list of project IDs or "all".')
+        project_ids = [p["project_id"] for p in catalog.records()]
+
+    # Deduplicate case-insensitively, preserving request order
+    unique_ids: dict[str, str] = {}
+    for pid in project_ids:
+        unique_ids.setdefault(pid.strip().casefold(), pid.strip())
+    project_ids = list(unique_ids.values())
+
+    skipped: dict[str, BatchItemResult] = {}
+    if only_changed:
+        for pid in project_ids:
+            project = get_project(pid)
+            if project is None:
+                continue  # reported as an error by the generation below
+            stored = load_output(project["project_id"])
+            if stored and stored.get("input_fingerprint") == _current_fingerprint(project, stored.get("model")):
+                skipped[pid] = BatchItemResult(project_id=pid, status="skipped")
+        logging.info(f"only_changed: {len(skipped)} of {len(project_ids)} projects unchanged — skipping them")
+    pending_ids = [pid for pid in project_ids if pid not in skipped]
+
+    max_concurrency = max(1, max_concurrency)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    finished = 0
 
+    logging.info(f"Starting batch generation for {len(pending_ids)} projects (max_concurrency={max_concurrency})")
+
+    async def run_one(project_id: str) -> BatchItemResult:
+        nonlocal finished
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                result = await generate_project_text_from_project_id(
+                    project_id,
+                    cache_mode=cache_mode,
+                    fan_out=fan_out,
+                )
+                item = BatchItemResult(
+                    project_id=project_id,
+                    status="ok",
+                    token_usage=result.token_usage,
+                    duration_seconds=round(time.perf_counter() - started, 3),
+                )
+            except Exception as e:
+                logging.error(f"Batch generation failed for {project_id}: {e}")
+                item = BatchItemResult(
+                    project_id=project_id,
+                    status="error",
+                    error=f"{type(e).__name__}: {e}",
+                    duration_seconds=round(time.perf_counter() - started, 3),
+                )
+        finished += 1
+        if ctx:
+            await ctx.report_progress(finished, len(pending_ids), message=f"{project_id}: {item.status}")
+        return item
+
+    batch_started = time.perf_counter()
+    generated = dict(zip(pending_ids, await asyncio.gather(*(run_one(pid) for pid in pending_ids))))
+    wall_clock = time.perf_counter() - batch_started
+    results = [skipped.get(pid) or generated[pid] for pid in project_ids]
+
+    total_usage = TokenUsage()
+    for item in results:
+        if item.token_usage:
+            total_usage.prompt_tokens += item.token_usage.prompt_tokens
+            total_usage.completion_tokens += item.token_usage.completion_tokens
+            total_usage.total_tokens += item.token_usage.total_tokens
+
+    succeeded = sum(1 for r in results if r.status == "ok")
+    failed = sum(1 for r in results if r.status == "error")
+    logging.info(
+        f"Batch complete: {succeeded}/{len(pending_ids)} succeeded, {len(skipped)} unchanged, "
+        f"in {wall_clock:.1f}s ({total_usage.total_tokens} tokens)"
+    )
+
+    return GenerateProjectTextsBatchOutput(
+        results=results,
+        succeeded=succeeded,
+        failed=failed,
+        skipped=len(skipped),
+        token_usage=total_usage,
+        wall_clock_seconds=round(wall_clock, 3),
+        max_concurrency=max_concurrency,
+    )
@@ -0,0 +1,141 @@
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from utils import env_flag
+
+# JSONL file receiving one line per finished span (disabled if unset)
+TRACE_FILE = os.getenv("TRACE_FILE")
+# Also export spans through OpenTelemetry (requires opentelemetry-api and a configured SDK)
+OTEL_TRACING = env_flag("OTEL_TRACING", False)
+# Wrap each generation in a profiler: "cprofile" or "pyinstrument"
+PROFILE = os.getenv("PROFILE", "").lower()
+
+_otel_tracer = None
+if OTEL_TRACING:
+    try:
+        from opentelemetry import trace as otel_trace
+        _otel_tracer = otel_trace.get_tracer("project-text-generator")
+    except ImportError:
+        logging.warning("OTEL_TRACING is set but opentelemetry is not installed — OpenTelemetry export disabled.")
+
+_current_trace: contextvars.ContextVar[str | None] = contextvars.ContextVar("trace_id", default=None)
+_current_span: contextvars.ContextVar[str | None] = contextvars.ContextVar("span_id", default=None)
+_write_lock = threading.Lock()
+_profiling = False
+
+
+#-------------------------
+# PIPELINE SPANS
+#-------------------------
+
+def _write_span(record: dict):
+    try:
+        with _write_lock:
+            with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    except OSError as e:
+        logging.warning(f"Could not write trace file {TRACE_FILE}: {e}")
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes):
+    """
+    Time a pipeline stage. Spans nest via contextvars, so the same trace_id
+    links all stages of one generation, including concurrent child tasks.
+    The duration is logged and, if configured, written to TRACE_FILE and OpenTelemetry.
+    """
+    trace_id = _current_trace.get() or uuid.uuid4().hex
+    span_id = uuid.uuid4().hex[:16]
+    parent_id = _current_span.get()
+    trace_token = _current_trace.set(trace_id)
+    span_token = _current_span.set(span_id)
+
+    otel_cm = _otel_tracer.start_as_current_span(name, attributes=attributes) if _otel_tracer else contextlib.nullcontext()
+    started_at = time.time()
+    started = time.perf_counter()
+    error = None
+    try:
+        with otel_cm:
+            yield
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        logging.info(f"[span] {name} {duration_ms:.1f} ms{' (error)' if error else ''}")
+        if TRACE_FILE:
+            _write_span({
+                "trace_id": trace_id,
+                "span_id": span_id,
+                "parent_id": parent_id,
+                "name": name,
+                "start": round(started_at, 6),
+                "duration_ms": round(duration_ms, 3),
+                "attributes": attributes,
+                "error": error,
+            })
+
+
+#-------------------------
+# PROFILING
+#-------------------------
+
+@contextlib.contextmanager
+def profiled(directory: Path):
+    """
+    Profile the enclosed block if PROFILE is set and store the result in directory
+    (profile.prof for cProfile, profile.html for pyinstrument).
+    Note that other coroutines running on the event loop at the same time are
+    included in the profile.
+    """
+    global _profiling
+    if PROFILE not in ("cprofile", "pyinstrument"):
+        yield
+        return
+    if _profiling:
+        # Only one profiler can be active per process (e.g. during a batch run)
+        logging.info(f"Profiler already active — not profiling run for {directory.name}.")
+        yield
+        return
+
+    if PROFILE == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logging.warning("PROFILE=pyinstrument but pyinstrument is not installed — profiling disabled.")
+            yield
+            return
+        profiler = Profiler(async_mode="enabled")
+        profiler.start()
+        _profiling = True
+        try:
+            yield
+        finally:
+            profiler.stop()
+            _profiling = False
+            directory.mkdir(parents=True, exist_ok=True)
+            (directory / "profile.html").write_text(profiler.output_html(), encoding="utf-8")
+            logging.info(f"Profile written to {directory / 'profile.html'}")
+        return
+
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    _profiling = True
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _profiling = False
+        directory.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(directory / "profile.prof")
+        logging.info(f"Profile written to {directory / 'profile.prof'}")
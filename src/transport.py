@@ -0,0 +1,267 @@
+import asyncio
+import email.utils
+import logging
+import os
+import random
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, TypeVar
+
+from ratelimit import rate_limiter
+
+if TYPE_CHECKING:
+    import httpx
+
+T = TypeVar("T")
+
+# Connection pool
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "10"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+
+# Per-request timeouts (seconds); read covers the gap between received bytes
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "120"))
+LLM_POOL_TIMEOUT = float(os.getenv("LLM_POOL_TIMEOUT", "30"))
+
+# Retry with exponential backoff and full jitter
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1.0"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "60"))
+
+# Circuit breaker
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+
+
+#-------------------------
+# HTTP TRANSPORT
+#-------------------------
+
+def build_http_client() -> "httpx.AsyncClient":
+    """Keep-alive connection pool with explicit limits and timeouts for the OpenAI client."""
+    import httpx
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE,
+            keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            connect=LLM_CONNECT_TIMEOUT,
+            read=LLM_READ_TIMEOUT,
+            write=LLM_CONNECT_TIMEOUT,
+            pool=LLM_POOL_TIMEOUT,
+        ),
+    )
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without contacting the endpoint while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failed attempts and rejects calls for
+    `cooldown` seconds. Afterwards a single trial call is let through (half-open);
+    its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._trial_in_flight = False
+
+    def before_call(self):
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.cooldown:
+                raise CircuitOpenError("LLM endpoint circuit is open — failing fast.")
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._trial_in_flight:
+                raise CircuitOpenError("LLM endpoint circuit is half-open — trial request in flight.")
+            self._trial_in_flight = True
+
+    def release_trial(self):
+        """Forget a trial call that was cancelled; the next call becomes the trial."""
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self._trial_in_flight = False
+        self.consecutive_failures = 0
+        self.state = "closed"
+
+    def record_failure(self):
+        self._trial_in_flight = False
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.threshold:
+            if self.state != "open":
+                self.times_opened += 1
+                logging.warning("LLM endpoint circuit opened after repeated failures.")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+
+def _is_retryable(error: Exception) -> bool:
+    import openai
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429
+
+
+def _retry_after_seconds(error: Exception) -> float | None:
+    """Parse Retry-After (seconds or HTTP date) or retry-after-ms from an error response."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    if (value := headers.get("retry-after-ms")) is not None:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    if (value := headers.get("retry-after")) is not None:
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        try:
+            parsed = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            # Malformed header: fall back to the normal backoff
+            return None
+        return max(0.0, parsed.timestamp() - time.time())
+    return None
+
+
+class PoolUsage:
+    """
+    Concurrent requests on the shared HTTP connection pool. There is one pool
+    for all models, so its usage is counted here and not per transport.
+    """
+
+    def __init__(self, max_connections: int):
+        self.max_connections = max_connections
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.saturated = 0
+
+    def acquire(self):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        if self.in_flight > self.max_connections:
+            # More concurrent requests than pooled connections: callers queue for a connection
+            self.saturated += 1
+
+    def release(self):
+        self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "max_connections": self.max_connections,
+            "saturated": self.saturated,
+        }
+
+
+pool_usage = PoolUsage(LLM_MAX_CONNECTIONS)
+
+
+class ResilientTransport:
+    """Wraps LLM calls with retry/backoff, a circuit breaker and usage counters."""
+
+    def __init__(
+        self,
+        *,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff_base: float = LLM_BACKOFF_BASE,
+        backoff_max: float = LLM_BACKOFF_MAX,
+        pool: PoolUsage = pool_usage,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool = pool
+        self.breaker = CircuitBreaker(LLM_BREAKER_THRESHOLD, LLM_BREAKER_COOLDOWN)
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        # Full jitter: uniform in [0, base * 2^attempt]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        attempt = 0
+        while True:
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError:
+                self.rejected += 1
+                raise
+
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            self.pool.acquire()
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                # A cancelled call says nothing about the endpoint, but must not hold the half-open trial
+                self.breaker.release_trial()
+                raise
+            except Exception as e:
+                if not _is_retryable(e):
+                    # The endpoint answered; the request itself was rejected
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if _is_rate_limited(e):
+                    # Lets the shared limiter reduce concurrency for all models
+                    rate_limiter.record_throttled()
+                if attempt >= self.max_retries or self.breaker.state == "open":
+                    self.failures += 1
+                    raise
+                delay = self._backoff(attempt, e)
+                attempt += 1
+                self.retries += 1
+                logging.warning(f"LLM request failed ({type(e).__name__}); retry {attempt}/{self.max_retries} in {delay:.1f}s")
+            else:
+                self.breaker.record_success()
+                return result
+            finally:
+                self.in_flight -= 1
+                self.pool.release()
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "rejected_by_breaker": self.rejected,
+            "circuit_state": self.breaker.state,
+            "circuit_opened": self.breaker.times_opened,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "pool": self.pool.stats(),
+        }
+
+
+transport = ResilientTransport()
@@ -0,0 +1,214 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+
+from utils import percentile
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+# Next to the generated outputs unless set explicitly
+LEDGER_PATH = Path(os.getenv(
+    "USAGE_LEDGER_PATH", Path(os.getenv("OUTPUT_DIR", PROJECT_ROOT / "src/outputs")) / "usage_ledger.jsonl"
+))
+
+# Window for the rolling throughput figures
+THROUGHPUT_WINDOW_SECONDS = float(os.getenv("USAGE_WINDOW_SECONDS", "300"))
+# Latency samples kept per model for the percentiles
+LATENCY_SAMPLES = int(os.getenv("USAGE_LATENCY_SAMPLES", "1000"))
+LATENCY_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+_write_lock = threading.Lock()
+
+
+#-------------------------
+# TOKEN USAGE LEDGER
+# Append-only JSONL, one line per LLM call
+#-------------------------
+
+def record_usage(
+    *,
+    model: str,
+    project_id: str | None,
+    prompt_tokens: int,
+    completion_tokens: int,
+    latency_seconds: float,
+    cache_hit: bool,
+    aborted: bool = False,
+):
+    """
+    Append one LLM call to the ledger. Failures to write are logged, never raised.
+    aborted marks a call that failed after tokens were spent; its token counts are estimates.
+    """
+    entry = {
+        "ts": round(time.time(), 3),
+        "model": model,
+        "project_id": project_id,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "latency_seconds": round(latency_seconds, 4),
+        "cache_hit": cache_hit,
+    }
+    if aborted:
+        entry["aborted"] = True
+    try:
+        with _write_lock:
+            LEDGER_PATH.parent.mkdir(parents=True, exist_ok=True)
+            with LEDGER_PATH.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    except OSError as e:
+        logging.warning(f"Could not append to usage ledger {LEDGER_PATH}: {e}")
+
+
+class _ModelStats:
+    def __init__(self):
+        self.requests = 0
+        self.cache_hits = 0
+        self.aborted = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.latency_sum = 0.0
+        self.latencies: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+
+class UsageLedger:
+    """
+    Incremental reader over the ledger file.
+    Only lines appended since the last refresh are parsed, so repeated
+    /metrics scrapes stay cheap however long the ledger grows.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._offset = 0
+        self._inode = None
+        self._reset()
+
+    def _reset(self):
+        self._models: dict[str, _ModelStats] = defaultdict(_ModelStats)
+        self._recent: deque[tuple[float, int]] = deque()
+        self._offset = 0
+
+    def refresh(self):
+        with self._lock:
+            try:
+                st = self.path.stat()
+            except FileNotFoundError:
+                self._reset()
+                return
+            # Start over if the ledger was rotated or truncated
+            if st.st_ino != self._inode or st.st_size < self._offset:
+                self._reset()
+                self._inode = st.st_ino
+            if st.st_size == self._offset:
+                return
+            with self.path.open("rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+            # Leave an incomplete last line for the next refresh
+            end = data.rfind(b"\n") + 1
+            self._offset += end
+            for line in data[:end].splitlines():
+                try:
+                    self._add(json.loads(line))
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    continue
+
+    def _add(self, entry: dict):
+        stats = self._models[entry["model"]]
+        stats.requests += 1
+        tokens = entry["prompt_tokens"] + entry["completion_tokens"]
+        if entry.get("cache_hit"):
+            stats.cache_hits += 1
+            stats.cached_tokens += tokens
+            return
+        stats.prompt_tokens += entry["prompt_tokens"]
+        stats.completion_tokens += entry["completion_tokens"]
+        self._recent.append((entry["ts"], tokens))
+        # Time to the abort says nothing about the latency of a full answer
+        if entry.get("aborted"):
+            stats.aborted += 1
+            return
+        stats.latency_sum += entry["latency_seconds"]
+        stats.latencies.append(entry["latency_seconds"])
+
+    def _throughput(self) -> dict:
+        cutoff = time.time() - THROUGHPUT_WINDOW_SECONDS
+        while self._recent and self._recent[0][0] < cutoff:
+            self._recent.popleft()
+        tokens = sum(t for _, t in self._recent)
+        return {
+            "window_seconds": THROUGHPUT_WINDOW_SECONDS,
+            "requests": len(self._recent),
+            "tokens": tokens,
+            "tokens_per_second": round(tokens / THROUGHPUT_WINDOW_SECONDS, 3),
+        }
+
+    def summary(self) -> dict:
+        self.refresh()
+        models = {}
+        for name, stats in sorted(self._models.items()):
+            latencies = sorted(stats.latencies)
+            models[name] = {
+                "requests": stats.requests,
+                "cache_hits": stats.cache_hits,
+                "aborted": stats.aborted,
+                "prompt_tokens": stats.prompt_tokens,
+                "completion_tokens": stats.completion_tokens,
+                "tokens_saved_by_cache": stats.cached_tokens,
+                "latency_seconds": {
+                    f"p{int(q * 100)}": percentile(latencies, q) for q in LATENCY_QUANTILES
+                },
+            }
+        return {
+            "models": models,
+            "throughput": self._throughput(),
+        }
+
+    def prometheus(self) -> str:
+        """Render the aggregates in the Prometheus text exposition format."""
+        self.refresh()
+        lines = [
+            "# HELP llm_requests_total LLM calls recorded in the usage ledger.",
+            "# TYPE llm_requests_total counter",
+        ]
+        for name, stats in sorted(self._models.items()):
+            lines.append(f'llm_requests_total{{model="{name}",cache_hit="false"}} {stats.requests - stats.cache_hits}')
+            lines.append(f'llm_requests_total{{model="{name}",cache_hit="true"}} {stats.cache_hits}')
+
+        for metric, attr, help_text in (
+            ("llm_prompt_tokens_total", "prompt_tokens", "Prompt tokens sent to the endpoint."),
+            ("llm_completion_tokens_total", "completion_tokens", "Completion tokens returned by the endpoint."),
+            ("llm_cache_saved_tokens_total", "cached_tokens", "Tokens served from the response cache."),
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+            for name, stats in sorted(self._models.items()):
+                lines.append(f'{metric}{{model="{name}"}} {getattr(stats, attr)}')
+
+        lines += [
+            "# HELP llm_request_latency_seconds Latency of uncached LLM calls.",
+            "# TYPE llm_request_latency_seconds summary",
+        ]
+        for name, stats in sorted(self._models.items()):
+            latencies = sorted(stats.latencies)
+            for q in LATENCY_QUANTILES:
+                value = percentile(latencies, q)
+                if value is not None:
+                    lines.append(f'llm_request_latency_seconds{{model="{name}",quantile="{q}"}} {value}')
+            lines.append(f'llm_request_latency_seconds_sum{{model="{name}"}} {round(stats.latency_sum, 4)}')
+            lines.append(f'llm_request_latency_seconds_count{{model="{name}"}} {stats.requests - stats.cache_hits - stats.aborted}')
+
+        throughput = self._throughput()
+        lines += [
+            "# HELP llm_throughput_tokens_per_second Uncached tokens per second over the rolling window.",
+            "# TYPE llm_throughput_tokens_per_second gauge",
+            f"llm_throughput_tokens_per_second {throughput['tokens_per_second']}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+usage_ledger = UsageLedger(LEDGER_PATH)
@@ -1,8 +1,47 @@
+import json
+import logging
+import os
+import re
+
 # keywords are extracted from these columns
 #_KEYWORD_COLS = ("Forschungsfelder", "Organisationseinheiten der Projektleitungen")
 _KEYWORD_COLS = ("Kooperationspartner", "Organisationseinheiten der Projektleitungen")
 #_KEYWORD_COLS = ()
 
+# A trailing object key without a value, left behind by truncated JSON
+_DANGLING_KEY = re.compile(r'([{,])\s*"(?:[^"\\]|\\.)*"\s*:?$')
+
+_TRUE_VALUES = ("1", "true", "yes", "on")
+_FALSE_VALUES = ("0", "false", "no", "off")
+
+
+def env_flag(name: str, default: bool) -> bool:
+    """
+    Read a boolean environment variable: 1/true/yes/on or 0/false/no/off (any case).
+    Unset, empty or unrecognised values give the default.
+    """
+    value = os.getenv(name, "").strip().lower()
+    if value in _TRUE_VALUES:
+        return True
+    if value in _FALSE_VALUES:
+        return False
+    if value:
+        logging.warning(f"Ignoring {name}={value!r} (expected one of {', '.join(_TRUE_VALUES + _FALSE_VALUES)}).")
+    return default
+
+
+def percentile(sorted_values: list[float], q: float) -> float | None:
+    """
+    Value at quantile q (0..1) of an ascending list, by nearest rank on the
+    (n - 1) scale, so q=0.5 of an odd-length list is its median. None if empty.
+    Used for every percentile the service and benchmarks report.
+    """
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
 def extract_keywords(project: dict) -> list[str]:
     """Extract thematic keywords from Forschungsfelder and Organisationseinheiten der Projektleitungen columns."""
     parts = [
@@ -29,8 +68,99 @@ def normalize_generated_entry(entry: dict) -> dict:
     if "reading_level" not in entry:
         entry["reading_level"] = "unknown"
 
-    # guard if LLM forgets word_count
-    if "word_count" not in entry:
-        entry["word_count"] = len(entry["text"].split())
+    # count the words instead of trusting the LLM's self-reported word_count
+    entry["word_count"] = len(entry["text"].split())
 
     return entry
+
+
+def _trim_incomplete(text: str, *, in_object: bool) -> str:
+    """Drop a dangling comma, or an object key without a value, before closing a container."""
+    while True:
+        text = text.rstrip()
+        if text.endswith(","):
+            text = text[:-1]
+        elif in_object and (match := _DANGLING_KEY.search(text)):
+            text = text[:match.start()] + (match.group(1) if match.group(1) == "{" else "")
+        else:
+            return text
+
+
+def repair_json(raw: str) -> dict:
+    """
+    Tolerant parser for LLM JSON output.
+    Handles markdown code fences, leading/trailing prose, trailing commas,
+    raw control characters inside strings and truncated output (unclosed
+    strings, objects and arrays). Raises ValueError if the result still
+    cannot be parsed into an object.
+    """
+    try:
+        parsed = json.loads(raw)
+        if isinstance(parsed, dict):
+            return parsed
+    except json.JSONDecodeError:
+        pass
+
+    start = raw.find("{")
+    if start == -1:
+        raise ValueError("no JSON object found in response")
+    text = raw[start:]
+    end = text.rfind("}")
+    # Cut trailing prose/fences, unless the object was truncated
+    if end != -1 and not text[end + 1:].strip(" \n\r\t`").startswith((",", '"')):
+        text = text[:end + 1]
+
+    out: list[str] = []
+    stack: list[str] = []
+    in_string = escape = False
+    for char in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            elif char == "\n":
+                char = "\\n"
+            elif char == "\t":
+                char = "\\t"
+            elif char == "\r":
+                char = "\\r"
+            out.append(char)
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if not stack:
+                break
+            stack.pop()
+            # Drop a trailing comma before the closing bracket
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+        out.append(char)
+        if not stack and char == "}":
+            break
+
+    # Close whatever the truncated output left open
+    if in_string:
+        if escape:
+            out.pop()
+        out.append('"')
+    repaired = "".join(out).rstrip()
+    while stack:
+        closer = stack.pop()
+        repaired = _trim_incomplete(repaired, in_object=closer == "}")
+        repaired += closer
+
+    try:
+        parsed = json.loads(repaired)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"could not repair JSON: {e}") from e
+    if not isinstance(parsed, dict):
+        raise ValueError("JSON response is not an object")
+    return parsed
@@ -0,0 +1,30 @@
+from bench_startup import _parse_import_times, _report_imports
+
+# Abridged from `python -X importtime -c "import json"`
+IMPORTTIME_SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       441 |        441 |   _io
+import time:       577 |       1532 | _frozen_importlib_external
+import time:        74 |         74 |     _codecs
+import time:       456 |        529 |   codecs
+import time:       859 |       2062 | encodings
+import time:       253 |        253 | encodings.utf_8
+"""
+
+
+def test_parse_import_times_keeps_only_nested_indentation():
+    rows = _parse_import_times(IMPORTTIME_SAMPLE)
+    assert rows[:3] == [
+        ("  _io", 441, 441),
+        ("_frozen_importlib_external", 577, 1532),
+        ("    _codecs", 74, 74),
+    ]
+    assert len(rows) == 6
+
+
+def test_report_imports_sums_top_level_rows(capsys):
+    total_ms = _report_imports(_parse_import_times(IMPORTTIME_SAMPLE), top=2)
+    assert total_ms == (1532 + 2062 + 253) / 1000
+    output = capsys.readouterr().out
+    assert "encodings\n" in output
+    assert "_codecs" not in output
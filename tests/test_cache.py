@@ -0,0 +1,31 @@
+from cache import ResponseCache
+
+
+def _cache(tmp_path, max_bytes=10_000) -> ResponseCache:
+    return ResponseCache(tmp_path, max_bytes=max_bytes, max_age_seconds=3600, scan_interval=3600)
+
+
+def test_size_is_tracked_without_rescanning(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put("aa1", {"text": "x" * 100})
+    scans = cache.scans
+    cache.put("bb2", {"text": "y" * 100})
+    cache.put("aa1", {"text": "z" * 50})
+    cache.discard("bb2")
+
+    assert cache.scans == scans
+    on_disk = sum(p.stat().st_size for p in tmp_path.glob("*/*.json"))
+    assert cache.stats()["bytes"] == on_disk
+    assert cache.stats()["entries"] == 1
+
+
+def test_exceeding_the_limit_evicts_least_recently_used(tmp_path):
+    cache = _cache(tmp_path, max_bytes=300)
+    for i in range(5):
+        cache.put(f"k{i}", {"text": str(i) * 100})
+
+    stats = cache.stats()
+    assert stats["bytes"] <= 300
+    assert stats["evictions"] > 0
+    assert cache.get("k4") is not None
+    assert cache.get("k0") is None
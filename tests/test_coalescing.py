@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from coalescing import SingleFlight
+
+
+async def test_concurrent_calls_with_the_same_key_share_one_execution():
+    flights = SingleFlight("test")
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    results = await asyncio.gather(*(flights.do("key", work) for _ in range(3)))
+    assert results == ["result"] * 3
+    assert calls == 1
+    assert flights.stats() == {"in_flight": 0, "executed": 1, "coalesced": 2}
+
+
+async def test_different_keys_run_separately():
+    flights = SingleFlight("test")
+
+    async def work(value):
+        await asyncio.sleep(0.01)
+        return value
+
+    assert await asyncio.gather(flights.do("a", lambda: work(1)), flights.do("b", lambda: work(2))) == [1, 2]
+    assert flights.executed == 2
+
+
+async def test_exception_is_shared_and_the_key_is_released():
+    flights = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(flights.do("key", fail), flights.do("key", fail), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def ok():
+        return "ok"
+
+    # A later call starts a fresh execution
+    assert await flights.do("key", ok) == "ok"
+    assert flights.executed == 2
+
+
+async def test_cancelled_caller_does_not_cancel_the_shared_work():
+    flights = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.ensure_future(flights.do("key", work))
+    second = asyncio.ensure_future(flights.do("key", work))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert await second == "done"
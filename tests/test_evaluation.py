@@ -0,0 +1,33 @@
+from evaluation import build_evaluation_result, reference_language, text_keys
+
+GERMAN_REFERENCE = "Das Projekt untersucht die Nutzung von Daten und die Folgen für die Forschung."
+TEXTS = {
+    "project_page": {"de": "Ein deutscher Text.", "en": "An English text."},
+    "faculty_teaser": {"de": "Ein Teaser.", "en": ""},
+}
+SCORE = {"semantic_similarity": 0.8, "factual_consistency": 0.7, "rouge_l": 0.3}
+
+
+def test_only_texts_in_the_reference_language_are_scored():
+    language = reference_language(GERMAN_REFERENCE)
+    assert language == "de"
+    assert text_keys(TEXTS, language) == [("project_page", "de"), ("faculty_teaser", "de")]
+
+
+def test_other_languages_are_marked_skipped():
+    keys = text_keys(TEXTS, "de")
+    result = build_evaluation_result(
+        project_id="P",
+        generated_texts=TEXTS,
+        human_reference_text=GERMAN_REFERENCE,
+        keys=keys,
+        scores=[SCORE] * len(keys),
+    )
+    assert result["metrics"] == SCORE
+    assert result["reference_language"] == "de"
+    assert result["per_text"]["project_page"]["de"]["status"] == "scored"
+    skipped = result["per_text"]["project_page"]["en"]
+    assert skipped["status"] == "skipped"
+    assert skipped["semantic_similarity"] is None
+    # Empty texts are not listed at all
+    assert "en" not in result["per_text"]["faculty_teaser"]
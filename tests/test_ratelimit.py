@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+import pytest
+
+import ratelimit
+from ratelimit import AdaptiveRateLimiter, TokenBucket
+
+MESSAGES = [{"role": "system", "content": "x" * 400}]
+
+
+@pytest.fixture
+def limiter(monkeypatch) -> AdaptiveRateLimiter:
+    monkeypatch.setattr(ratelimit, "LLM_ADAPTIVE_CONCURRENCY", True)
+    monkeypatch.setattr(ratelimit, "LLM_CONCURRENCY_START", 2)
+    monkeypatch.setattr(ratelimit, "LLM_CONCURRENCY_MIN", 1)
+    monkeypatch.setattr(ratelimit, "LLM_CONCURRENCY_MAX", 8)
+    monkeypatch.setattr(ratelimit, "LLM_RPM_LIMIT", 0)
+    monkeypatch.setattr(ratelimit, "LLM_TPM_LIMIT", 0)
+    return AdaptiveRateLimiter()
+
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.wait_time(60) == 0.0
+    bucket.take(60)
+    # One unit per second refills
+    assert bucket.wait_time(1) == pytest.approx(1.0, abs=0.05)
+
+
+def test_estimate_uses_prompt_length_and_expected_completion(limiter):
+    assert limiter.estimate(MESSAGES, "text") == 100 + ratelimit.LLM_EXPECTED_COMPLETION_TOKENS
+
+
+async def test_concurrency_limit_admits_waiters_in_fifo_order(limiter):
+    order = []
+    release = asyncio.Event()
+
+    async def request(name: str):
+        async with limiter.slot(MESSAGES, "text"):
+            order.append(name)
+            await release.wait()
+
+    tasks = [asyncio.ensure_future(request(name)) for name in "abcd"]
+    await asyncio.sleep(0.01)
+    assert order == ["a", "b"]
+    assert limiter.in_flight == 2
+    assert limiter.stats()["waiting"] == 2
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert order == ["a", "b", "c", "d"]
+    assert limiter.in_flight == 0
+
+
+async def test_successes_increase_the_limit_additively(limiter):
+    for _ in range(2):
+        async with limiter.slot(MESSAGES, "text"):
+            pass
+    # +1/limit per success: 2 -> 2.5 -> 2.9
+    assert limiter.limit == pytest.approx(2.9)
+    assert limiter.increases == 2
+
+
+def test_throttling_halves_the_limit_once_per_burst(limiter):
+    limiter.limit = 8
+    limiter.record_throttled()
+    limiter.record_throttled()
+    assert limiter.limit == 4
+    assert limiter.throttled == 2
+    assert limiter.decreases == 1
+
+
+def test_limit_never_drops_below_the_minimum(limiter):
+    limiter.limit = 1.5
+    limiter.record_throttled()
+    assert limiter.limit == 1
+
+
+async def test_latency_spike_reduces_the_limit(limiter, monkeypatch):
+    monkeypatch.setattr(ratelimit, "BASELINE_MIN_SAMPLES", 2)
+    usage = type("Usage", (), {"completion_tokens": 100, "total_tokens": 200})()
+    for _ in range(2):
+        async with limiter.slot(MESSAGES, "text") as slot:
+            slot.finish(usage)
+    limit = limiter.limit
+
+    async with limiter.slot(MESSAGES, "text") as slot:
+        # Far slower per token than the near-zero baseline
+        time.sleep(0.05)
+        slot.finish(usage)
+    assert limiter.latency_spikes == 1
+    assert limiter.limit < limit
+
+
+async def test_failed_call_releases_its_slot_without_feedback(limiter):
+    with pytest.raises(RuntimeError):
+        async with limiter.slot(MESSAGES, "text"):
+            raise RuntimeError("boom")
+    assert limiter.in_flight == 0
+    assert limiter.increases == 0
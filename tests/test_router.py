@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+import router
+from router import ModelRouter
+
+
+async def test_attempt_timeout_falls_back_before_output(monkeypatch):
+    monkeypatch.setattr(router, "LLM_ATTEMPT_TIMEOUT", 0.05)
+    pool = ModelRouter(["slow", "fast"])
+
+    async def call(model, transport):
+        await asyncio.sleep(1 if model == "slow" else 0)
+        return model
+
+    assert await pool.run(call) == ("fast", "fast")
+    assert pool.models[0].failures == 1
+
+
+async def test_attempt_timeout_does_not_cut_a_started_stream(monkeypatch):
+    monkeypatch.setattr(router, "LLM_ATTEMPT_TIMEOUT", 0.05)
+    pool = ModelRouter(["primary", "secondary"])
+    emitted = False
+
+    async def stream(model, transport):
+        nonlocal emitted
+        emitted = True
+        await asyncio.sleep(0.2)
+        return model
+
+    result = await pool.run(stream, should_fallback=lambda e: not emitted)
+    assert result == ("primary", "primary")
+    assert pool.models[0].failures == 0
+
+
+def test_empty_pool_is_rejected():
+    with pytest.raises(ValueError):
+        ModelRouter([])
+
+
+async def test_error_falls_back_and_cools_the_model_down():
+    pool = ModelRouter(["broken", "ok"])
+
+    async def call(model, transport):
+        if model == "broken":
+            raise ConnectionError("down")
+        return model
+
+    assert await pool.run(call) == ("ok", "ok")
+    assert pool.fallbacks == 1
+    # The failed model is tried last until its cooldown ends
+    assert [m.name for m in pool.candidates()] == ["ok", "broken"]
+
+
+async def test_primary_is_tried_first_again_after_a_failure_and_its_cooldown(monkeypatch):
+    monkeypatch.setattr(router, "LLM_ROUTING", "latency")
+    monkeypatch.setattr(router, "LLM_MODEL_COOLDOWN", 0)
+    pool = ModelRouter(["primary", "secondary"])
+    failing = True
+
+    async def call(model, transport):
+        if model == "primary" and failing:
+            raise ConnectionError("transient")
+        return model
+
+    assert await pool.run(call) == ("secondary", "secondary")
+    failing = False
+    # The secondary is now measured, the primary is not: it keeps its pool position
+    assert await pool.run(call) == ("primary", "primary")
+    assert pool.fallbacks == 1
+
+
+async def test_error_without_fallback_is_raised_immediately():
+    pool = ModelRouter(["first", "second"])
+    calls = []
+
+    async def call(model, transport):
+        calls.append(model)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        await pool.run(call, should_fallback=lambda e: not isinstance(e, ValueError))
+    assert calls == ["first"]
+    assert pool.models[0].failures == 0
+
+
+async def test_last_error_is_raised_when_every_model_fails():
+    pool = ModelRouter(["a", "b"])
+
+    async def call(model, transport):
+        raise ConnectionError(model)
+
+    with pytest.raises(ConnectionError, match="b"):
+        await pool.run(call)
+
+
+def test_latency_routing_prefers_the_fastest_measured_model(monkeypatch):
+    monkeypatch.setattr(router, "LLM_ROUTING", "latency")
+    pool = ModelRouter(["a", "b", "c"])
+    pool.models[0].record_success(2.0)
+    pool.models[1].record_success(0.5)
+    assert [m.name for m in pool.candidates()] == ["b", "a", "c"]
+
+    monkeypatch.setattr(router, "LLM_ROUTING", "priority")
+    assert [m.name for m in pool.candidates()] == ["a", "b", "c"]
+
+
+async def test_hedge_answers_from_the_second_model_when_the_first_is_slow(monkeypatch):
+    monkeypatch.setattr(router, "LLM_HEDGE", True)
+    monkeypatch.setattr(router, "LLM_HEDGE_MIN_SAMPLES", 1)
+    monkeypatch.setattr(router, "LLM_ROUTING", "priority")
+    pool = ModelRouter(["slow", "fast"])
+    pool.models[0].record_success(0.01)
+
+    async def call(model, transport):
+        await asyncio.sleep(1 if model == "slow" else 0)
+        return model
+
+    assert await pool.run(call, hedge=True) == ("fast", "fast")
+    assert pool.hedges == 1
+    assert pool.hedge_wins == 1
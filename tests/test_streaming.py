@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from streaming import GenerationStreamTracker, StreamStructureError, completed_entries
+
+ENTRY = {"text": "Text", "reading_level": "beginner", "word_count": 1}
+
+
+def _response(languages=("de", "en"), **extra) -> str:
+    return json.dumps({
+        **extra,
+        "project_page": {lang: ENTRY for lang in languages},
+        "faculty_teaser": {lang: ENTRY for lang in languages},
+        "used_keywords": ["a"],
+        "warnings": [],
+    })
+
+
+def test_unknown_top_level_key_before_the_sections_is_ignored():
+    text = _response(project_id="X")
+    assert sorted(completed_entries(text, ["de", "en"])) == [
+        ("faculty_teaser", "de"), ("faculty_teaser", "en"),
+        ("project_page", "de"), ("project_page", "en"),
+    ]
+
+
+def test_stream_tracker_tolerates_unknown_top_level_key():
+    tracker = GenerationStreamTracker(["de"])
+    for char in _response(languages=("de",), meta={"de": {"nested": True}}):
+        tracker.feed(char)
+    tracker.finish()
+    assert tracker.completed == [("project_page", "de"), ("faculty_teaser", "de")]
+
+
+def test_tracker_reports_entries_as_their_objects_close():
+    tracker = GenerationStreamTracker(["de", "en"])
+    events = [event for char in "```json\n" + _response() for event in tracker.feed(char)]
+    tracker.finish()
+    assert events == [
+        ("project_page", "de"), ("project_page", "en"),
+        ("faculty_teaser", "de"), ("faculty_teaser", "en"),
+    ]
+
+
+def test_strings_with_braces_do_not_close_entries():
+    entry = {"text": 'A "quoted" {brace} and } more', "reading_level": "beginner"}
+    text = json.dumps({"project_page": {"de": entry}, "faculty_teaser": {"de": entry}})
+    tracker = GenerationStreamTracker(["de"])
+    tracker.feed(text[:text.index("and")])
+    assert tracker.completed == []
+    tracker.feed(text[text.index("and"):])
+    assert tracker.completed == [("project_page", "de"), ("faculty_teaser", "de")]
+
+
+@pytest.mark.parametrize("text, reason", [
+    ("Sure! Here is the JSON", "does not start with a JSON object"),
+    ('{"project_page": "text"', "project_page must be an object"),
+    ('{"project_page": {"fr": {', "unexpected language 'fr'"),
+    ('{"project_page": {"de": "text"', "project_page.de must be an object"),
+    ('{"project_page": {"de": {}}}', "response closed without"),
+])
+def test_tracker_fails_on_the_first_layout_violation(text, reason):
+    tracker = GenerationStreamTracker(["de"])
+    with pytest.raises(StreamStructureError, match=reason):
+        tracker.feed(text)
+
+
+def test_finish_raises_for_an_unclosed_object():
+    tracker = GenerationStreamTracker(["de"])
+    tracker.feed(_response(languages=("de",))[:-1])
+    with pytest.raises(StreamStructureError):
+        tracker.finish()
+
+
+def test_completed_entries_ignores_truncated_entries():
+    text = _response()
+    cut = text.index('"en"', text.index("faculty_teaser")) + 10
+    assert completed_entries(text[:cut], ["de", "en"]) == [
+        ("project_page", "de"), ("project_page", "en"), ("faculty_teaser", "de"),
+    ]
@@ -0,0 +1,109 @@
+import asyncio
+import time
+
+import pytest
+
+from transport import CircuitBreaker, CircuitOpenError, PoolUsage, ResilientTransport, _retry_after_seconds
+
+
+def _half_open(transport: ResilientTransport):
+    breaker = transport.breaker
+    breaker.state = "open"
+    breaker.opened_at = time.monotonic() - breaker.cooldown - 1
+
+
+async def test_cancelled_trial_does_not_lock_the_breaker():
+    transport = ResilientTransport()
+    _half_open(transport)
+
+    async def slow():
+        await asyncio.sleep(10)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(transport.call(slow), 0.05)
+    assert transport.breaker.state == "half_open"
+    assert transport.in_flight == 0
+
+    async def ok():
+        return "ok"
+
+    assert await transport.call(ok) == "ok"
+    assert transport.breaker.state == "closed"
+
+
+async def test_second_call_is_rejected_while_trial_in_flight():
+    transport = ResilientTransport()
+    _half_open(transport)
+    started = asyncio.Event()
+
+    async def trial():
+        started.set()
+        await asyncio.sleep(0.05)
+        return "trial"
+
+    task = asyncio.ensure_future(transport.call(trial))
+    await started.wait()
+    with pytest.raises(CircuitOpenError):
+        await transport.call(trial)
+    assert await task == "trial"
+
+
+def test_breaker_opens_after_threshold_and_half_opens_after_cooldown():
+    breaker = CircuitBreaker(threshold=2, cooldown=0.05)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.times_opened == 2
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(threshold=2, cooldown=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    assert breaker.consecutive_failures == 1
+
+
+class _ErrorWithHeaders(Exception):
+    def __init__(self, headers: dict):
+        super().__init__("error")
+        self.response = type("Response", (), {"headers": headers})()
+
+
+@pytest.mark.parametrize("headers, expected", [
+    ({"retry-after-ms": "250"}, 0.25),
+    ({"retry-after": "3"}, 3.0),
+    ({"retry-after": "soon"}, None),
+    ({"retry-after": ""}, None),
+    ({}, None),
+])
+def test_retry_after_parsing(headers, expected):
+    assert _retry_after_seconds(_ErrorWithHeaders(headers)) == expected
+
+
+def test_retry_after_http_date_in_the_past_is_zero():
+    error = _ErrorWithHeaders({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})
+    assert _retry_after_seconds(error) == 0.0
+
+
+async def test_pool_saturation_is_counted_across_transports():
+    pool = PoolUsage(max_connections=1)
+    first, second = ResilientTransport(pool=pool), ResilientTransport(pool=pool)
+
+    async def ok():
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    await asyncio.gather(first.call(ok), second.call(ok))
+    assert pool.peak_in_flight == 2
+    assert pool.saturated == 1
+    assert pool.in_flight == 0
@@ -0,0 +1,23 @@
+import json
+
+import usage
+from usage import UsageLedger, record_usage
+
+
+def test_aborted_call_counts_tokens_but_not_latency(tmp_path, monkeypatch):
+    ledger_path = tmp_path / "ledger.jsonl"
+    monkeypatch.setattr(usage, "LEDGER_PATH", ledger_path)
+    common = {"model": "m", "project_id": "P", "cache_hit": False}
+    record_usage(prompt_tokens=100, completion_tokens=50, latency_seconds=2.0, **common)
+    record_usage(prompt_tokens=100, completion_tokens=10, latency_seconds=0.3, aborted=True, **common)
+
+    entries = [json.loads(line) for line in ledger_path.read_text().splitlines()]
+    assert "aborted" not in entries[0]
+    assert entries[1]["aborted"] is True
+
+    summary = UsageLedger(ledger_path).summary()["models"]["m"]
+    assert summary["requests"] == 2
+    assert summary["aborted"] == 1
+    assert summary["prompt_tokens"] == 200
+    assert summary["completion_tokens"] == 60
+    assert summary["latency_seconds"]["p50"] == 2.0
@@ -0,0 +1,62 @@
+import pytest
+
+from utils import env_flag, percentile, repair_json
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1", True), ("TRUE", True), ("yes", True), ("on", True),
+    ("0", False), ("false", False), ("No", False), ("off", False),
+])
+def test_env_flag_values(monkeypatch, value, expected):
+    monkeypatch.setenv("TEST_FLAG", value)
+    assert env_flag("TEST_FLAG", not expected) is expected
+
+
+@pytest.mark.parametrize("value", [None, "", "maybe"])
+def test_env_flag_falls_back_to_default(monkeypatch, value):
+    if value is None:
+        monkeypatch.delenv("TEST_FLAG", raising=False)
+    else:
+        monkeypatch.setenv("TEST_FLAG", value)
+    assert env_flag("TEST_FLAG", True) is True
+    assert env_flag("TEST_FLAG", False) is False
+
+
+def test_repair_json_strips_fences_and_prose():
+    raw = 'Here you go:\n```json\n{"a": 1, "b": [1, 2]}\n```\nHope this helps.'
+    assert repair_json(raw) == {"a": 1, "b": [1, 2]}
+
+
+def test_repair_json_drops_trailing_commas():
+    assert repair_json('{"a": [1, 2,], "b": {"c": 3,},}') == {"a": [1, 2], "b": {"c": 3}}
+
+
+def test_repair_json_escapes_raw_control_characters_in_strings():
+    # The literal contains a raw newline and tab, which json.loads rejects inside strings
+    assert repair_json('{"text": "line one\nline two\tend"}') == {"text": "line one\nline two\tend"}
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ('{"a": {"text": "cut off', {"a": {"text": "cut off"}}),
+    ('{"a": [1, 2', {"a": [1, 2]}),
+    ('{"a": 1, "b":', {"a": 1}),
+    ('{"a": 1, "b"', {"a": 1}),
+    ('{"a": 1,', {"a": 1}),
+])
+def test_repair_json_closes_truncated_output(raw, expected):
+    assert repair_json(raw) == expected
+
+
+@pytest.mark.parametrize("raw", ["no json here", "[1, 2, 3]"])
+def test_repair_json_rejects_non_objects(raw):
+    with pytest.raises(ValueError):
+        repair_json(raw)
+
+
+def test_percentile_uses_nearest_rank():
+    values = [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert percentile(values, 0.0) == 1.0
+    assert percentile(values, 0.5) == 3.0
+    assert percentile(values, 0.95) == 5.0
+    assert percentile(values, 1.0) == 5.0
+    assert percentile([], 0.5) is None